@@ -0,0 +1,251 @@
+"""
+Long-lived analysis service. Keeps warm API clients, Gemini analyzers and the VADER analyzer across jobs,
+and accepts jobs through a queue with job IDs and status polling.
+
+    python analysis_service.py --port 8765 --workers 4
+
+HTTP API (JSON):
+    POST /jobs            {"url": "<youtube url>"}  -> 202 {"job_id": "..."}
+    GET  /jobs/<job_id>   -> {"job_id", "url", "status": queued|running|done|error, "result"|"error", ...}
+    GET  /metrics         -> Prometheus-style metrics text
+    GET  /health          -> {"status": "ok", "queued": n, "running": n}
+
+The Tkinter UI and batch_cli can also use the service in-process through get_service(); service_client.py
+talks to a running service over HTTP.
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+from cache import ResultCache
+from feedback_extractor import FeedbackExtractor
+from pipeline import analyze_video, results_to_record
+from result_store import ResultStore, get_store
+from sentiment_analyzer import SentimentAnalyzer
+from summarizer import Summarizer
+from tracing import get_tracer
+from youtubeAPICon import YouTubeAPICon
+
+# Default per-stage concurrency across all jobs. Network-bound fetches get more slots than Gemini calls.
+STAGE_LIMITS = {"metadata": 8, "transcript": 8, "comments": 4, "summary": 2, "sentiment": 2, "feedback": 2}
+
+
+class ClientPool:
+    """
+    Fixed-size pool of pre-built YouTubeAPICon clients. The underlying httplib2 connection is not
+    thread-safe, so each concurrent job borrows its own client instead of sharing one.
+    """
+
+    def __init__(self, factory: Callable[[], YouTubeAPICon], size: int):
+        self._clients = queue.Queue()
+        for _ in range(size):
+            self._clients.put(factory())
+
+    def acquire(self) -> YouTubeAPICon:
+        return self._clients.get()
+
+    def release(self, client: YouTubeAPICon):
+        self._clients.put(client)
+
+
+class AnalysisService:
+    """
+    Runs analysis jobs on a fixed set of worker threads using clients and analyzers built once at start-up.
+    Stage semaphores are shared by every job, so e.g. at most STAGE_LIMITS["summary"] Gemini summaries
+    run at once no matter how many jobs are in flight.
+    """
+
+    def __init__(self, youtube_api_key: Optional[str] = None, gemini_api_key: Optional[str] = None,
+                 workers: int = 4, cache: Optional[ResultCache] = None, stage_limits: Optional[Dict[str, int]] = None,
+                 max_finished_jobs: int = 1000, client_factory: Optional[Callable[[], YouTubeAPICon]] = None,
+                 model: Any = None, store: Optional[ResultStore] = None, sampling: Optional[Dict[str, Any]] = None,
+                 include_replies: bool = False):
+        self.youtube_api_key = youtube_api_key
+        self.gemini_api_key = gemini_api_key
+        self.cache = cache
+        self.store = store
+        self.sampling = sampling  # AdaptiveSampler options, None to fetch the full comment limit
+        self.include_replies = include_replies
+        self.max_finished_jobs = max_finished_jobs
+        # Warm-up: discovery document, Gemini models and the VADER lexicon are loaded once here and shared by jobs
+        factory = client_factory or (lambda: YouTubeAPICon(youtube_api_key, cache=cache))
+        self.clients = ClientPool(factory, workers)
+        self.summarizer = Summarizer(gemini_api_key, cache, model=model)
+        self.feedback_extractor = FeedbackExtractor(gemini_api_key, cache, model=model)
+        self.sentiment_analyzer = SentimentAnalyzer()
+        self.summarizer._get_model()
+        self.feedback_extractor._get_model()
+        limits = {**STAGE_LIMITS, **(stage_limits or {})}
+        self.stage_limits = {stage: threading.BoundedSemaphore(limit) for stage, limit in limits.items()}
+
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def analyze(self, video_url: str, on_update: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+        """
+        Run one analysis synchronously on the warm clients and return the full analyze_video() result.
+        on_update receives stage results and streamed text as they arrive (see build_analysis_pipeline).
+        """
+        client = self.clients.acquire()
+        try:
+            return analyze_video(
+                video_url, self.youtube_api_key, self.gemini_api_key, cache=self.cache, api=client,
+                summarizer=self.summarizer, sentiment_analyzer=self.sentiment_analyzer,
+                feedback_extractor=self.feedback_extractor, stage_limits=self.stage_limits, on_update=on_update,
+                sampling=self.sampling, include_replies=self.include_replies
+            )
+        finally:
+            self.clients.release(client)
+
+    def record(self, video_url: str, results: Dict[str, Any]) -> Dict[str, Any]:
+        """results_to_record() view of an analyze() result, saved to the result store if there is one"""
+        record = results_to_record(video_url, results)
+        if self.store is not None:
+            record["run_id"] = self.store.add(record, results["sentiment"].get("scores"))
+        return record
+
+    def submit(self, video_url: str) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        with self._jobs_lock:
+            self.jobs[job_id] = {"job_id": job_id, "url": video_url, "status": "queued", "submitted": time.time()}
+        get_tracer().incr("service_jobs_total", status="queued")
+        self._queue.put(job_id)
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._jobs_lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll: float = 0.2) -> Dict[str, Any]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.status(job_id)
+            if job is None:
+                raise KeyError(f"Unknown job: {job_id}")
+            if job["status"] in ("done", "error"):
+                return job
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Job {job_id} did not finish within {timeout}s")
+            time.sleep(poll)
+
+    def counts(self) -> Dict[str, int]:
+        with self._jobs_lock:
+            statuses = [job["status"] for job in self.jobs.values()]
+        return {status: statuses.count(status) for status in ("queued", "running", "done", "error")}
+
+    def _update(self, job_id: str, **fields: Any):
+        with self._jobs_lock:
+            self.jobs[job_id].update(fields)
+            if fields.get("status") in ("done", "error"):
+                self._trim()
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["status"] in ("done", "error")]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job_id]
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            job = self.status(job_id)
+            self._update(job_id, status="running", started=time.time())
+            try:
+                results = self.analyze(job["url"])
+                self._update(job_id, status="done", finished=time.time(), result=self.record(job["url"], results))
+                get_tracer().incr("service_jobs_total", status="done")
+            except Exception as e:
+                self._update(job_id, status="error", finished=time.time(), error=f"{type(e).__name__}: {e}")
+                get_tracer().incr("service_jobs_total", status="error")
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service(**kwargs: Any) -> AnalysisService:
+    """Process-wide service, created on first use from the environment's API keys, saving to the shared result store"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = AnalysisService(os.getenv("YOUTUBE_API_KEY"), os.getenv("GEMINI_API_KEY"),
+                                       cache=ResultCache(), store=get_store(), **kwargs)
+        return _service
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    service: AnalysisService = None
+
+    def _send(self, status: int, body: Any, content_type: str = "application/json"):
+        payload = body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)
+        data = payload.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._send(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            url = json.loads(self.rfile.read(length) or b"{}")["url"]
+        except (ValueError, KeyError, TypeError):
+            return self._send(400, {"error": 'expected a JSON body like {"url": "..."}'})
+        self._send(202, {"job_id": self.service.submit(url)})
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        if path == "/health":
+            return self._send(200, {"status": "ok", **self.service.counts()})
+        if path == "/metrics":
+            return self._send(200, get_tracer().prometheus_text(), content_type="text/plain")
+        if path.startswith("/jobs/"):
+            job = self.service.status(path[len("/jobs/"):])
+            return self._send(200, job) if job else self._send(404, {"error": "unknown job"})
+        self._send(404, {"error": "not found"})
+
+    def log_message(self, format, *args):
+        pass  # request logging is covered by the tracer metrics
+
+
+def serve(service: AnalysisService, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    handler = type("BoundServiceHandler", (ServiceHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the long-lived analysis service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=4, help="jobs analyzed at once")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="fetch comments only until the sentiment shares are precise enough")
+    parser.add_argument("--replies", action="store_true", help="analyze reply threads as well as top-level comments")
+    args = parser.parse_args(argv)
+
+    service = get_service(workers=args.workers, sampling={} if args.adaptive else None,
+                          include_replies=args.replies)
+    server = serve(service, args.host, args.port)
+    print(f"Analysis service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
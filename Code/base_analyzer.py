@@ -1,14 +1,102 @@
+import functools
+import threading
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Callable, Optional
+from cache import ResultCache
+from rate_limiter import RateLimiter, get_rate_limiter
+from tracing import get_tracer
+
+
+_genai_lock = threading.Lock()
+_genai_api_key = None
+
+
+def load_genai(api_key: str) -> Any:
+    """
+    Import and configure the Gemini SDK. It is imported on first use rather than at module load because it takes
+    most of a second and pulls in PIL, which batch runs, service clients and injected models never need.
+    genai.configure() drops the SDK's cached clients, so it only runs again when the API key changes.
+    """
+    global _genai_api_key
+    import google.generativeai as genai
+    with _genai_lock:
+        if _genai_api_key != api_key:
+            genai.configure(api_key=api_key)
+            _genai_api_key = api_key
+    return genai
+
 
 class BaseAnalyzer(ABC):
     """
     Abstract base class for all analyzers.
     Ensures consistency in the analyze() method implementation.
+    Every subclass's analyze() is traced automatically as a "<ClassName>.analyze" span.
     """
 
-    def __init__(self, api_key: str = None):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        analyze = cls.__dict__.get("analyze")
+        if analyze is not None and not getattr(analyze, "__isabstractmethod__", False):
+            span_name = f"{cls.__name__}.analyze"
+
+            @functools.wraps(analyze)
+            def traced_analyze(self, *args, **kwargs):
+                with get_tracer().span(span_name):
+                    return analyze(self, *args, **kwargs)
+
+            cls.analyze = traced_analyze
+
+    def __init__(self, api_key: str = None, cache: Optional[ResultCache] = None,
+                 limiter: Optional[RateLimiter] = None):
         self.api_key = api_key
+        self.cache = cache
+        self.limiter = limiter or get_rate_limiter()
+        self.model = None
+        self._model_lock = threading.Lock()
+
+    def _load_model(self, model_name: str) -> Any:
+        """The analyzer's Gemini model, built on first use and then reused by every later call and thread"""
+        if self.model is None:
+            with self._model_lock:
+                if self.model is None:
+                    self.model = load_genai(self.api_key).GenerativeModel(model_name)
+        return self.model
+
+    def _cached(self, namespace: str, compute: Callable[[], Any], *key_parts: Any) -> Any:
+        """Run compute() through the result cache, if one is configured. Failed (None) results are not cached."""
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(ResultCache.make_key(namespace, *key_parts), compute)
+
+    def _generate_text(self, model: Any, prompt: str, **kwargs: Any) -> str:
+        """Call an LLM through the shared rate limiter, recording prompt and response sizes"""
+        tracer = get_tracer()
+        analyzer = type(self).__name__
+        tracer.incr("llm_requests_total", analyzer=analyzer)
+        tracer.incr("llm_prompt_chars_total", len(prompt), analyzer=analyzer)
+        text = self.limiter.call("gemini", model.generate_content, prompt, **kwargs).text.strip()
+        tracer.incr("llm_response_chars_total", len(text), analyzer=analyzer)
+        return text
+
+    def _stream_text(self, model: Any, prompt: str, on_chunk: Callable[[str], None], **kwargs: Any) -> str:
+        """Like _generate_text, but asks for a streamed reply and passes each text chunk to on_chunk as it arrives"""
+        tracer = get_tracer()
+        analyzer = type(self).__name__
+        tracer.incr("llm_requests_total", analyzer=analyzer)
+        tracer.incr("llm_prompt_chars_total", len(prompt), analyzer=analyzer)
+        # Only starting the request goes through the limiter's retries; a stream that fails midway raises
+        response = self.limiter.call("gemini", model.generate_content, prompt, stream=True, **kwargs)
+        chunks = []
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                continue  # chunks without text parts, e.g. the closing one that only carries the finish reason
+            chunks.append(text)
+            on_chunk(text)
+        text = "".join(chunks).strip()
+        tracer.incr("llm_response_chars_total", len(text), analyzer=analyzer)
+        return text
 
     @abstractmethod
     def analyze(self, data: Any) -> Any:
@@ -0,0 +1,190 @@
+"""
+Headless batch runner: analyzes every URL in a file without starting the Tkinter UI.
+
+    python batch_cli.py urls.txt --output results.jsonl --workers 4 [--txt-reports] [--service http://host:8765]
+
+Results are appended to the output file as JSON lines and saved to the result store. Re-running with the
+same output file skips URLs that already completed successfully, so interrupted batches can be resumed.
+With --service the videos are analyzed (and stored) by a running analysis_service instead of in this process.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional, Set
+from cache import ResultCache
+from comment_sampler import AdaptiveSampler
+from report_writer import save_report
+from result_store import ResultStore
+from service_client import ServiceClient
+from tracing import enable_json_log, get_tracer
+
+
+def read_urls(path: str) -> List[str]:
+    """One URL per line; blank lines and # comments are ignored, duplicates are dropped"""
+    urls = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            url = line.strip()
+            if url and not url.startswith("#") and url not in seen:
+                seen.add(url)
+                urls.append(url)
+    return urls
+
+
+def completed_urls(output_path: str) -> Set[str]:
+    """URLs that already have a successful record in the output file"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["url"])
+    return done
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def print_summary(records: Iterable[Dict[str, Any]], elapsed: float):
+    records = list(records)
+    ok = [record for record in records if record["status"] == "ok"]
+    print(f"\nProcessed {len(records)} videos ({len(ok)} ok, {len(records) - len(ok)} failed) in {elapsed:.1f}s")
+    if elapsed > 0:
+        print(f"Throughput: {len(records) / elapsed * 60:.2f} videos/min")
+    stages = {}
+    for record in ok:
+        for stage, secs in record["timings"].items():
+            stages.setdefault(stage, []).append(secs)
+    if stages:
+        print(f"{'stage':<12}{'p50 (s)':>10}{'p95 (s)':>10}")
+        for stage, values in stages.items():
+            print(f"{stage:<12}{percentile(values, 50):>10.2f}{percentile(values, 95):>10.2f}")
+    samples = [record["sampling"] for record in ok if record.get("sampling")]
+    if samples:
+        sizes = [sample["sample_size"] for sample in samples]
+        margins = [sample["margin"] for sample in samples]
+        print(f"Adaptive sampling: median {percentile(sizes, 50)} comments "
+              f"({sum(sample['pages'] for sample in samples)} pages in total), "
+              f"median margin ±{percentile(margins, 50):.1%}, worst ±{max(margins):.1%}")
+
+
+def run_batch(urls: List[str], output_path: str, workers: int, txt_reports: bool,
+              cache: ResultCache = None, service: Optional[ServiceClient] = None,
+              store: Optional[ResultStore] = None, **options: Any) -> List[Dict[str, Any]]:
+    """Analyze the URLs on `workers` threads; options (sampling, include_replies, ...) go to analyze_video"""
+    youtube_api_key = os.getenv("YOUTUBE_API_KEY")
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    write_lock = threading.Lock()
+    records = []
+    if service is None:
+        # Imported here so that --service runs, which only talk HTTP, never load the API SDKs
+        from pipeline import analyze_video, results_to_record
+
+    def process(url: str) -> Dict[str, Any]:
+        try:
+            if service is not None:
+                job = service.wait(service.submit(url))
+                if job["status"] == "error":
+                    raise RuntimeError(job["error"])
+                record = job["result"]
+            else:
+                results = analyze_video(url, youtube_api_key, gemini_api_key, cache=cache, **options)
+                record = results_to_record(url, results)
+                if store is not None:
+                    record["run_id"] = store.add(record, results["sentiment"].get("scores"))
+        except Exception as e:
+            record = {"url": url, "status": "error", "error": f"{type(e).__name__}: {e}"}
+        with write_lock:
+            with open(output_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process, url) for url in urls]
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            status = "ok" if record["status"] == "ok" else f"error ({record['error']})"
+            print(f"[{len(records)}/{len(urls)}] {record['url']}: {status}")
+
+    if txt_reports:
+        for record in records:
+            if record["status"] != "ok":
+                continue
+            # Service records were stored by the service; export those straight from the returned record
+            if store is not None and service is None:
+                store.export(record["run_id"])
+            else:
+                save_report(record)
+    return records
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze many YouTube videos without the GUI.")
+    parser.add_argument("url_file", help="text file with one YouTube URL per line")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="JSON lines output file (appended to)")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="number of videos analyzed at once")
+    parser.add_argument("--txt-reports", action="store_true", help="also export a text report per video")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the on-disk result cache")
+    parser.add_argument("--trace-log", help="write per-stage trace spans to this file as JSON lines")
+    parser.add_argument("--metrics-out", help="write Prometheus-style metrics to this file at the end")
+    parser.add_argument("--service", help="submit jobs to a running analysis service at this URL")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="fetch comments only until the sentiment shares are precise enough")
+    parser.add_argument("--margin", type=float, default=AdaptiveSampler.TARGET_MARGIN,
+                        help="with --adaptive, the largest acceptable confidence interval half-width")
+    parser.add_argument("--replies", action="store_true", help="analyze reply threads as well as top-level comments")
+    parser.add_argument("--max-comments", type=int,
+                        help="comments (including replies) fetched per video without --adaptive "
+                             "(default: DataRetrieval.MAX_COMMENTS)")
+    parser.add_argument("--store", default="results/analysis_results.sqlite3", help="result store path")
+    parser.add_argument("--no-store", action="store_true", help="do not save results to the result store")
+    args = parser.parse_args(argv)
+
+    if args.trace_log:
+        enable_json_log(args.trace_log)
+
+    urls = read_urls(args.url_file)
+    done = completed_urls(args.output)
+    pending = [url for url in urls if url not in done]
+    if done:
+        print(f"Resuming: {len(urls) - len(pending)} of {len(urls)} URLs already completed")
+
+    cache = None if args.no_cache or args.service else ResultCache()
+    service = ServiceClient(args.service) if args.service else None
+    store = None if args.no_store or args.service else ResultStore(args.store)
+    start = time.perf_counter()
+    options = {"sampling": {"target_margin": args.margin} if args.adaptive else None,
+               "include_replies": args.replies}
+    if args.max_comments is not None:
+        options["max_comments"] = args.max_comments
+    records = run_batch(pending, args.output, args.workers, args.txt_reports, cache=cache, service=service,
+                        store=store, **options)
+    if store is not None:
+        store.close()
+    print_summary(records, time.perf_counter() - start)
+    if cache is not None:
+        print(f"Cache: {cache.stats()}")
+    if args.metrics_out:
+        with open(args.metrics_out, "w", encoding="utf-8") as f:
+            f.write(get_tracer().prometheus_text())
+    return 0 if all(record["status"] == "ok" for record in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
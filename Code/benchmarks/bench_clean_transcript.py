@@ -0,0 +1,67 @@
+"""
+Time and peak-memory benchmark for transcript cleaning on multi-hour transcripts, comparing the
+segment-level TranscriptCleaner with the original join-then-regex implementation.
+Auto-generated captions (no punctuation) and manually punctuated transcripts are measured separately,
+since the comma- and sentence-based filler rules only run on the latter.
+Run from the Code directory: python -m benchmarks.bench_clean_transcript [--hours 1 4 12]
+"""
+import argparse
+import re
+import time
+import tracemalloc
+from typing import Callable, List
+from data_preprocessor import DataPreprocessor
+from benchmarks.fakes import synthetic_transcript
+
+
+def legacy_clean_transcript(segments: List[str]) -> str:
+    """Join, strip timestamps, remove fillers and lowercase, each step copying the whole transcript"""
+    raw_transcript = ' '.join(segments)
+    cleaned = re.sub(r'\[\d+:\d+(?::\d+)?]', '', raw_transcript)
+    fillers = ["um", "uh", "like", "you know", "so", "actually", "basically", "literally", "right"]
+    pattern = r'\b(' + '|'.join(fillers) + r')\b'
+    cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
+    return cleaned.lower()
+
+
+def punctuate(segment: str) -> str:
+    """Turn a synthetic caption line into a punctuated sentence with comma-delimited fillers"""
+    for filler in ("like", "so", "you know", "right"):
+        segment = segment.replace(f" {filler} ", f", {filler}, ")
+    return segment.capitalize() + "."
+
+
+def measure(func: Callable[[List[str]], str], segments: List[str], repeat: int):
+    """Best wall time of `repeat` runs, and peak memory allocated during one run"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(segments)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(segments)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=int, nargs="+", default=[1, 4, 12])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'transcript':<12}{'hours':>5}{'chars':>10}{'legacy (s)':>12}{'legacy MB':>11}"
+          f"{'segment (s)':>13}{'segment MB':>12}")
+    for hours in args.hours:
+        captions = [entry["text"] for entry in synthetic_transcript(hours * 60)]
+        for kind, segments in (("captions", captions), ("punctuated", [punctuate(s) for s in captions])):
+            chars = sum(len(segment) for segment in segments)
+            legacy_time, legacy_peak = measure(legacy_clean_transcript, segments, args.repeat)
+            current_time, current_peak = measure(DataPreprocessor.clean_transcript, segments, args.repeat)
+            print(f"{kind:<12}{hours:>5}{chars:>10}{legacy_time:>12.3f}{legacy_peak / 2**20:>11.1f}"
+                  f"{current_time:>13.3f}{current_peak / 2**20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
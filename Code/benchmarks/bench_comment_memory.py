@@ -0,0 +1,98 @@
+"""
+Peak-memory benchmark for the comment path (fetch, filter, sentiment, prompt selection) on large comment
+sets, comparing plain lists of strings with the compact CommentStore, with and without reply threads.
+Exits with status 1 when the CommentStore path needs more than --max-bytes-per-comment at any size.
+Run from the Code directory: python -m benchmarks.bench_comment_memory [--sizes 5000 50000 100000]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from typing import Callable, Tuple
+from benchmarks.fakes import FakeTranscriptApi, FakeYouTube
+from comment_selector import CommentSelector
+from data_preprocessor import DataPreprocessor
+from data_retrieval import DataRetrieval
+from rate_limiter import RateLimiter
+from sentiment_analyzer import SentimentAnalyzer
+from youtubeAPICon import YouTubeAPICon
+
+VIDEO_URL = "https://www.youtube.com/watch?v=bench000001"
+REPLIES_PER_THREAD = 3
+
+
+def make_api(threads: int, replies_per_thread: int = 0) -> YouTubeAPICon:
+    return YouTubeAPICon(None, limiter=RateLimiter(), youtube=FakeYouTube(threads, replies_per_thread=replies_per_thread),
+                         transcript_api=FakeTranscriptApi(1))
+
+
+def prompt_texts(sentiment) -> Tuple[str, str]:
+    selector = CommentSelector()
+    works = "\n".join(selector.select(sentiment["positive"], fallback=sentiment["neutral"]))
+    needs = "\n".join(selector.select(sentiment["negative"], fallback=sentiment["neutral"]))
+    return works, needs
+
+
+def list_path(api: YouTubeAPICon, analyzer: SentimentAnalyzer, size: int) -> int:
+    """Lists of str end to end, top-level comments only"""
+    comments = api.fetch_comments("bench000001", max_comments=size)
+    filtered = DataPreprocessor.filter_comments(comments)
+    sentiment = analyzer.analyze(filtered)
+    prompt_texts(sentiment)
+    return len(filtered)
+
+
+def store_path(api: YouTubeAPICon, analyzer: SentimentAnalyzer, size: int, replies: bool = False) -> int:
+    """CommentStore and CommentViews end to end"""
+    dr = DataRetrieval(None, VIDEO_URL, api=api, max_comments=size, include_replies=replies)
+    dr.validate_url()
+    comments = dr.get_comments()
+    sentiment = analyzer.analyze_batch(comments, processes=1, keep_text=True)
+    prompt_texts(sentiment)
+    return len(comments)
+
+
+def measure(func: Callable[[], int]) -> Tuple[float, int, int]:
+    """
+    Wall time, peak traced memory and comment count of one run. The fakes' own data and the VADER lexicon
+    (a fixed few MB, loaded once per process) are built beforehand, so the peak scales with the comments.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 50000, 100000])
+    parser.add_argument("--max-bytes-per-comment", type=int, default=600,
+                        help="fail if the CommentStore path peaks above this per kept comment")
+    args = parser.parse_args()
+
+    print(f"{'path':<16}{'comments':>10}{'kept':>9}{'time (s)':>10}{'peak MB':>10}{'B/comment':>11}")
+    failed = False
+    analyzer = SentimentAnalyzer()
+    for size in args.sizes:
+        for name, replies, path in (("lists", False, list_path), ("store", False, store_path),
+                                    ("store+replies", True, store_path)):
+            if replies:
+                api = make_api(size // (1 + REPLIES_PER_THREAD), REPLIES_PER_THREAD)
+                elapsed, peak, count = measure(lambda: path(api, analyzer, size, replies=True))
+            else:
+                api = make_api(size)
+                elapsed, peak, count = measure(lambda: path(api, analyzer, size))
+            per_comment = peak // max(count, 1)
+            print(f"{name:<16}{size:>10}{count:>9}{elapsed:>10.2f}{peak / 2**20:>10.1f}{per_comment:>11}")
+            if name != "lists" and per_comment > args.max_bytes_per_comment:
+                failed = True
+    if failed:
+        print(f"CommentStore peak memory exceeded {args.max_bytes_per_comment} bytes per comment")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
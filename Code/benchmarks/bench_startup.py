@@ -0,0 +1,70 @@
+"""
+Start-up benchmark for the GUI: import time of user_interface and time to first paint of the main window,
+each measured in a fresh interpreter. The first run uses an empty image cache (PIL decodes and resizes the
+backgrounds), later runs read the cached copies. Also lists which heavy modules were loaded at first paint.
+Run from the Code directory: python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY_MODULES = ["googleapiclient", "google.generativeai", "youtube_transcript_api", "vaderSentiment", "PIL"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import user_interface
+user_interface.IMAGE_CACHE_DIR = sys.argv[1]
+imported = time.perf_counter()
+result = {"import": imported - start, "first_paint": None}
+try:
+    app = user_interface.YouTubeApp(preload=False)
+    app.update()
+    result["first_paint"] = time.perf_counter() - start
+    app.destroy()
+except Exception as e:  # no display available
+    result["error"] = str(e)
+result["heavy_modules"] = [name for name in HEAVY_MODULES if name in sys.modules]
+print(json.dumps(result))
+"""
+
+
+def probe(image_cache_dir: str) -> dict:
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", f"HEAVY_MODULES = {HEAVY_MODULES!r}\n{PROBE}", image_cache_dir],
+        capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - start
+    return result
+
+
+def fmt(seconds) -> str:
+    return "n/a" if seconds is None else f"{seconds * 1000:.0f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as image_cache_dir:
+        runs = [probe(image_cache_dir) for _ in range(args.runs)]
+    cold, warm = runs[0], runs[1:] or runs
+    best = min(warm, key=lambda run: run["process"])
+
+    print(f"{'':<22}{'import':>10}{'first paint':>14}{'process':>10}")
+    print(f"{'cold image cache':<22}{fmt(cold['import']):>10}{fmt(cold['first_paint']):>14}{fmt(cold['process']):>10}")
+    print(f"{'warm (best of ' + str(len(warm)) + ')':<22}{fmt(best['import']):>10}"
+          f"{fmt(best['first_paint']):>14}{fmt(best['process']):>10}")
+    print(f"heavy modules loaded at first paint: {', '.join(best['heavy_modules']) or 'none'}")
+    if "error" in best:
+        print(f"window not created: {best['error']}")
+
+
+if __name__ == "__main__":
+    main()
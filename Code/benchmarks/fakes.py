@@ -0,0 +1,246 @@
+"""
+Local stand-ins for the YouTube Data API, the transcript API and Gemini, with configurable
+latency and sizes. They generate deterministic synthetic data so benchmarks run offline.
+"""
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+WORDS = ["great", "video", "thanks", "love", "this", "explanation", "the", "editing", "was", "too", "fast",
+         "audio", "could", "be", "better", "really", "helpful", "tutorial", "more", "please", "boring", "bad",
+         "confusing", "awesome", "clear", "music", "loud", "examples", "part", "two"]
+SPAM = ["subscribe to my channel", "visit https://example.com/promo", "free gift at spam@example.com",
+        "click here 10.0.0.1"]
+FILLERS = ["um", "uh", "like", "you know", "so", "actually", "basically", "literally", "right"]
+
+
+def synthetic_comments(count: int, seed: int = 42) -> List[str]:
+    """Mix of unique comments, case/whitespace variants of earlier ones and spam"""
+    rng = random.Random(seed)
+    comments = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.15 and comments:
+            base = rng.choice(comments)
+            comments.append(base.upper() if rng.random() < 0.5 else base.replace(" ", "  "))
+        elif roll < 0.25:
+            comments.append(f"{' '.join(rng.choices(WORDS, k=6))} {rng.choice(SPAM)}")
+        else:
+            comments.append(' '.join(rng.choices(WORDS, k=rng.randint(4, 25))))
+    return comments
+
+
+def synthetic_transcript(minutes: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Transcript entries in youtube_transcript_api format, roughly 150 spoken words per minute"""
+    rng = random.Random(seed)
+    entries = []
+    for i in range(minutes * 20):
+        words = rng.choices(WORDS, k=6) + [rng.choice(FILLERS)]
+        rng.shuffle(words)
+        start = i * 3.0
+        text = ' '.join(words)
+        if i % 10 == 0:
+            text = f"[{int(start // 60)}:{int(start % 60):02d}] {text}"
+        entries.append({"text": text, "start": start, "duration": 3.0})
+    return entries
+
+
+class FakeRequest:
+    def __init__(self, handler, params: Dict[str, Any]):
+        self.handler = handler
+        self.params = params
+
+    def execute(self) -> Dict[str, Any]:
+        return self.handler(self.params)
+
+
+class FakeYouTube:
+    """
+    Minimal fake of the googleapiclient YouTube v3 resource: videos().list, commentThreads().list / list_next,
+    comments().list / list_next, channels().list and playlistItems().list / list_next (a single uploads
+    playlist of playlist_size videos). Every execute() sleeps for page_latency seconds.
+    """
+
+    PAGE_SIZE = 100
+
+    def __init__(self, comment_count: int = 500, page_latency: float = 0.0, duration: str = "PT10M",
+                 replies_per_thread: int = 0, seed: int = 42, playlist_size: int = 30):
+        self.comment_count = comment_count
+        self.page_latency = page_latency
+        self.duration = duration
+        self.replies_per_thread = replies_per_thread
+        self.playlist_size = playlist_size
+        self.comment_texts = synthetic_comments(comment_count, seed)
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, endpoint: str):
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        if self.page_latency:
+            time.sleep(self.page_latency)
+
+    # Resource accessors, mirroring googleapiclient's youtube.videos(), youtube.commentThreads(), ...
+    def videos(self):
+        return _Resource(self._videos_list)
+
+    def commentThreads(self):
+        return _Resource(self._threads_list)
+
+    def comments(self):
+        return _Resource(self._comments_list)
+
+    def channels(self):
+        return _Resource(self._channels_list)
+
+    def playlistItems(self):
+        return _Resource(self._playlist_items_list)
+
+    def _channels_list(self, params):
+        self._record("channels.list")
+        return {"items": [{"id": "UCsynthetic", "contentDetails": {"relatedPlaylists": {"uploads": "UUsynthetic"}}}]}
+
+    def _playlist_items_list(self, params):
+        self._record("playlistItems.list")
+        start = int(params.get("pageToken") or 0)
+        end = min(start + min(params.get("maxResults", 5), 50), self.playlist_size)
+        response = {"items": [{"contentDetails": {"videoId": f"v{i:010d}"}} for i in range(start, end)]}
+        if end < self.playlist_size:
+            response["nextPageToken"] = str(end)
+        return response
+
+    def _videos_list(self, params):
+        self._record("videos.list")
+        return {"items": [{
+            "id": params["id"],
+            "snippet": {"title": f"Synthetic video {params['id']}", "channelId": "UCsynthetic",
+                        "channelTitle": "Synthetic Channel"},
+            "contentDetails": {"duration": self.duration},
+            "statistics": {"viewCount": "123456", "likeCount": "4321",
+                           "commentCount": str(self.comment_count * (1 + self.replies_per_thread))},
+        }]}
+
+    def _comment(self, index: int, text: str, parent: Optional[str] = None) -> Dict[str, Any]:
+        comment_id = f"{parent}.r{index}" if parent else f"c{index}"
+        # Newest first, one comment per minute going back from a fixed date
+        published = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1_700_000_000 - index * 60))
+        # A fresh str per response, as a decoded JSON body would have
+        text = text.encode("utf-8").decode("utf-8")
+        snippet = {"textDisplay": text, "textOriginal": text, "likeCount": index % 17, "publishedAt": published}
+        if parent:
+            snippet["parentId"] = parent
+        return {"id": comment_id, "snippet": snippet}
+
+    def _threads_list(self, params):
+        self._record("commentThreads.list")
+        start = int(params.get("pageToken") or 0)
+        end = min(start + min(params.get("maxResults", 20), self.PAGE_SIZE), self.comment_count)
+        items = []
+        for i in range(start, end):
+            top = self._comment(i, self.comment_texts[i])
+            thread = {"id": top["id"], "snippet": {"topLevelComment": top, "totalReplyCount": self.replies_per_thread}}
+            if self.replies_per_thread and "replies" in params.get("part", ""):
+                # The API embeds at most five replies per thread
+                thread["replies"] = {"comments": [
+                    self._comment(r, f"reply {r} to {self.comment_texts[i]}", parent=top["id"])
+                    for r in range(min(5, self.replies_per_thread))
+                ]}
+            items.append(thread)
+        response = {"items": items}
+        if end < self.comment_count:
+            response["nextPageToken"] = str(end)
+        return response
+
+    def _comments_list(self, params):
+        self._record("comments.list")
+        parent = params["parentId"]
+        start = int(params.get("pageToken") or 0)
+        end = min(start + min(params.get("maxResults", 20), self.PAGE_SIZE), self.replies_per_thread)
+        response = {"items": [self._comment(r, f"reply {r} to {parent}", parent=parent) for r in range(start, end)]}
+        if end < self.replies_per_thread:
+            response["nextPageToken"] = str(end)
+        return response
+
+
+class _Resource:
+    def __init__(self, handler):
+        self.handler = handler
+
+    def list(self, **params) -> FakeRequest:
+        return FakeRequest(self.handler, params)
+
+    def list_next(self, previous_request: FakeRequest, previous_response: Dict[str, Any]) -> Optional[FakeRequest]:
+        token = previous_response.get("nextPageToken")
+        if not token:
+            return None
+        return FakeRequest(self.handler, {**previous_request.params, "pageToken": token})
+
+
+class FakeTranscriptApi:
+    """Stands in for YouTubeTranscriptApi; get_transcript sleeps for `latency` and returns synthetic entries"""
+
+    def __init__(self, minutes: int = 10, latency: float = 0.0):
+        self.entries = synthetic_transcript(minutes)
+        self.latency = latency
+        self.calls = 0
+
+    def get_transcript(self, video_id: str) -> List[Dict[str, Any]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.entries
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """
+    Stands in for genai.GenerativeModel. Each call sleeps for `latency` seconds plus `per_kchar`
+    seconds per thousand prompt characters before the first output, then `chunk_latency` per further
+    chunk of STREAM_CHUNK_CHARS characters, and records the prompts it was sent. With stream=True the
+    reply is returned as an iterator of chunks, like the real SDK.
+    """
+
+    STREAM_CHUNK_CHARS = 16
+
+    def __init__(self, latency: float = 0.0, per_kchar: float = 0.0, chunk_latency: float = 0.0):
+        self.latency = latency
+        self.per_kchar = per_kchar
+        self.chunk_latency = chunk_latency
+        self.prompts: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self) -> int:
+        return len(self.prompts)
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        with self._lock:
+            self.prompts.append(prompt)
+        if "JSON object" in prompt:
+            text = json.dumps({
+                "what_works": "*   **Clarity**: Viewers found the explanation easy to follow.",
+                "needs_improvement": "*   **Audio**: Several viewers said the music was too loud.",
+            })
+        else:
+            text = f"Synthetic response to a {len(prompt)}-character prompt."
+        chunks = [text[i:i + self.STREAM_CHUNK_CHARS] for i in range(0, len(text), self.STREAM_CHUNK_CHARS)]
+        first_delay = self.latency + self.per_kchar * len(prompt) / 1000
+        if stream:
+            return self._stream(chunks, first_delay)
+        delay = first_delay + self.chunk_latency * (len(chunks) - 1)
+        if delay:
+            time.sleep(delay)
+        return FakeResponse(text)
+
+    def _stream(self, chunks: List[str], first_delay: float) -> Iterator[FakeResponse]:
+        for i, chunk in enumerate(chunks):
+            delay = first_delay if i == 0 else self.chunk_latency
+            if delay:
+                time.sleep(delay)
+            yield FakeResponse(chunk)
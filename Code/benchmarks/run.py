@@ -0,0 +1,151 @@
+"""
+Offline benchmark suite for the analysis pipeline, using the local fakes in benchmarks/fakes.py.
+
+    python -m benchmarks.run [--sizes 500 5000 50000] [--output benchmarks/results.json]
+                             [--baseline benchmarks/baseline.json] [--update-baseline]
+
+Each benchmark reports the best of --repeat runs. The run fails (exit code 1) when any benchmark is slower
+than its baseline by more than --tolerance, or when there is no baseline to compare against.
+benchmarks/baseline.json is a reference run of the default configuration. Timings depend on the machine, so
+regenerate it with --update-baseline before gating on different hardware.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List
+from benchmarks.fakes import FakeGeminiModel, FakeTranscriptApi, FakeYouTube, synthetic_comments
+from data_preprocessor import DataPreprocessor
+from pipeline import analyze_video
+from rate_limiter import RateLimiter
+from sentiment_analyzer import SentimentAnalyzer
+from youtubeAPICon import YouTubeAPICon
+
+VIDEO_ID = "bench000001"
+VIDEO_URL = f"https://www.youtube.com/watch?v={VIDEO_ID}"
+
+
+def best_of(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return {"seconds": min(runs), "runs": runs}
+
+
+def make_api(size: int, page_latency: float, transcript_minutes: int = 10) -> YouTubeAPICon:
+    # An unconfigured RateLimiter has no budgets, so the fakes are never throttled
+    return YouTubeAPICon(None, limiter=RateLimiter(), youtube=FakeYouTube(size, page_latency),
+                         transcript_api=FakeTranscriptApi(transcript_minutes))
+
+
+def transcript_segments(minutes: int) -> List[str]:
+    return [entry["text"] for entry in FakeTranscriptApi(minutes).entries]
+
+
+def benchmarks_for(size: int, args) -> Dict[str, Callable[[], Any]]:
+    comments = synthetic_comments(size)
+    filtered = DataPreprocessor.filter_comments(comments)
+    # Transcript length scales with the comment count: 10, 100 and 1000 minutes for 500, 5k and 50k
+    transcript = transcript_segments(max(1, size // 50))
+    analyzer = SentimentAnalyzer()
+    return {
+        "fetch_comments": lambda: make_api(size, args.page_latency).fetch_comments(VIDEO_ID, max_comments=size),
+        "clean_transcript": lambda: DataPreprocessor.clean_transcript(transcript),
+        "filter_comments": lambda: DataPreprocessor.filter_comments(comments),
+        "sentiment_analyze": lambda: analyzer.analyze(filtered),
+        "end_to_end": lambda: analyze_video(
+            VIDEO_URL, None, None,
+            api=make_api(size, args.page_latency), model=FakeGeminiModel(args.llm_latency),
+            limiter=RateLimiter(), max_comments=size
+        ),
+        # Pages only until the sentiment shares are precise enough, independent of the video's comment count
+        "end_to_end_adaptive": lambda: analyze_video(
+            VIDEO_URL, None, None,
+            api=make_api(size, args.page_latency), model=FakeGeminiModel(args.llm_latency),
+            limiter=RateLimiter(), sampling={}
+        ),
+    }
+
+
+def run_suite(args) -> Dict[str, Any]:
+    results = {}
+    for size in args.sizes:
+        for name, func in benchmarks_for(size, args).items():
+            if args.only and name not in args.only:
+                continue
+            key = f"{name}[{size}]"
+            results[key] = best_of(func, args.repeat)
+            print(f"{key:<28}{results[key]['seconds']:>10.4f}s")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "config": {"sizes": args.sizes, "repeat": args.repeat, "page_latency": args.page_latency,
+                       "llm_latency": args.llm_latency},
+        },
+        "results": results,
+    }
+
+
+def find_regressions(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+                     noise_floor: float) -> List[str]:
+    regressions = []
+    for key, result in current["results"].items():
+        if key not in baseline.get("results", {}):
+            continue
+        before = baseline["results"][key]["seconds"]
+        after = result["seconds"]
+        if after > before * (1 + tolerance) and after - before > noise_floor:
+            regressions.append(f"{key}: {before:.4f}s -> {after:.4f}s (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the offline pipeline benchmarks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000, 50000], help="comment counts")
+    parser.add_argument("--only", nargs="+", help="run only these benchmarks (e.g. filter_comments)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--page-latency", type=float, default=0.02, help="fake YouTube latency per page (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="fake Gemini latency per call (s)")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results.json"))
+    parser.add_argument("--baseline", default=os.path.join("benchmarks", "baseline.json"))
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument("--noise-floor", type=float, default=0.005, help="ignore slowdowns below this (s)")
+    args = parser.parse_args(argv)
+
+    current = run_suite(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline updated at {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline found at {args.baseline}; run with --update-baseline to create one")
+        return 1
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["meta"]["config"] != current["meta"]["config"]:
+        print(f"[WARN] Baseline was recorded with {baseline['meta']['config']}, this run used "
+              f"{current['meta']['config']}; only benchmarks present in both are compared")
+    regressions = find_regressions(current, baseline, args.tolerance, args.noise_floor)
+    if regressions:
+        print("Performance regressions:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Optional
+from tracing import get_tracer
+
+
+class ResultCache:
+    """
+    Persistent, content-addressed cache for API responses and LLM results.
+    Entries are zlib-compressed JSON in a single SQLite file. Each entry can carry a TTL,
+    and the least recently used entries are evicted once the cache grows past max_bytes.
+    """
+
+    def __init__(self, path: str = "cache/analysis_cache.sqlite3", max_bytes: int = 64 * 1024 * 1024,
+                 default_ttl: Optional[float] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(namespace: str, *parts: Any) -> str:
+        """Build a stable key from a namespace and any JSON-serialisable parts (video ID, model, prompt, ...)"""
+        digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"{namespace}:{digest}"
+
+    @staticmethod
+    def fingerprint(text: str) -> str:
+        """Short content hash, used to version keys by prompt template or input text"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None when the key is missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                get_tracer().incr("cache_requests_total", outcome="miss", namespace=key.split(":", 1)[0])
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            get_tracer().incr("cache_requests_total", outcome="hit", namespace=key.split(":", 1)[0])
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a JSON-serialisable value. None values are not cached."""
+        if value is None:
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now + ttl if ttl else None, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return the cached value for key, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value, ttl)
+        return value
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters plus the current number of entries and stored bytes"""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,183 @@
+"""
+Channel and playlist mode: resolves a channel or playlist to its videos, analyzes them concurrently on the
+shared AnalysisService and aggregates sentiment distributions and recurring feedback themes across videos.
+
+    python channel_analysis.py <channel or playlist URL> [--max-videos 20] [--workers 4] [--output report.json]
+
+Channel URLs can be https://www.youtube.com/channel/UC..., https://www.youtube.com/@handle, a bare UC... ID
+or @handle; playlist URLs are anything with a list= parameter.
+"""
+import argparse
+import json
+import re
+import statistics
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from analysis_service import AnalysisService, get_service
+from cache import ResultCache
+from sentiment_analyzer import SentimentAnalyzer
+from youtubeAPICon import YouTubeAPICon
+
+# Feedback bullets start with a bolded subtopic, e.g. "*   **Audio Quality**: ..."
+THEME_REGEX = re.compile(r'\*\*([^*]+?)\*\*')
+CHANNEL_ID_PATTERN = r'UC[A-Za-z0-9_-]{22}'
+HANDLE_PATTERN = r'@[A-Za-z0-9._-]+'
+
+
+def parse_collection_url(url: str) -> Tuple[str, str]:
+    """Return ("playlist", playlist ID) or ("channel", channel ID or @handle)"""
+    url = url.strip()
+    match = re.search(r'[?&]list=([A-Za-z0-9_-]+)', url)
+    if match:
+        return "playlist", match.group(1)
+    match = re.search(rf'youtube\.com/(?:channel/({CHANNEL_ID_PATTERN})|({HANDLE_PATTERN}))', url)
+    if match:
+        return "channel", match.group(1) or match.group(2)
+    if re.fullmatch(f'{CHANNEL_ID_PATTERN}|{HANDLE_PATTERN}', url):
+        return "channel", url
+    raise ValueError("Invalid YouTube channel or playlist URL")
+
+
+def feedback_themes(feedback_text: Optional[str]) -> List[str]:
+    """Normalised bolded subtopics of one feedback bullet list, without repeats"""
+    themes = []
+    for theme in THEME_REGEX.findall(feedback_text or ""):
+        theme = re.sub(r'\s+', ' ', theme.strip(' :.')).lower()
+        if theme and theme not in themes:
+            themes.append(theme)
+    return themes
+
+
+def aggregate(records: List[Dict[str, Any]], min_videos: int = 2) -> Dict[str, Any]:
+    """
+    Channel-level view of per-video records (results_to_record format): pooled and per-video sentiment
+    shares, and the feedback themes that recur in at least min_videos videos.
+    """
+    ok = [record for record in records if record["status"] == "ok"]
+    totals = {label: sum(record["sentiment"][label] for record in ok) for label in SentimentAnalyzer.LABELS}
+    pooled = sum(totals.values()) or 1
+
+    videos = []
+    for record in ok:
+        total = sum(record["sentiment"].values()) or 1
+        videos.append({
+            "video_id": record["video_id"],
+            "title": record["metadata"]["title"],
+            "comments": sum(record["sentiment"].values()),
+            **{f"{label}_share": round(record["sentiment"][label] / total, 4) for label in SentimentAnalyzer.LABELS},
+        })
+    videos.sort(key=lambda video: video["positive_share"], reverse=True)
+    positive_shares = [video["positive_share"] for video in videos]
+
+    themes = {}
+    for field in ("what_works", "needs_improvement"):
+        counts = Counter()
+        video_ids = {}
+        for record in ok:
+            for theme in feedback_themes(record["feedback"].get(field)):
+                counts[theme] += 1
+                video_ids.setdefault(theme, []).append(record["video_id"])
+        themes[field] = [
+            {"theme": theme, "videos": count, "video_ids": video_ids[theme]}
+            for theme, count in counts.most_common() if count >= min(min_videos, len(ok))
+        ]
+
+    return {
+        "videos_analyzed": len(ok),
+        "videos_failed": len(records) - len(ok),
+        "sentiment_totals": totals,
+        "sentiment_shares": {label: round(count / pooled, 4) for label, count in totals.items()},
+        "positive_share_mean": round(statistics.mean(positive_shares), 4) if positive_shares else None,
+        "positive_share_stdev": round(statistics.pstdev(positive_shares), 4) if positive_shares else None,
+        "videos": videos,
+        "themes": themes,
+    }
+
+
+class ChannelAnalyzer:
+    """
+    Analyzes every video of a channel or playlist, at most max_videos of them and `workers` at a time,
+    through the shared service, so all videos draw on the same warm clients, stage limits and rate limiter.
+    Per-video records are kept in the result cache and reused by later runs until RECORD_TTL expires.
+    """
+
+    RECORD_TTL = YouTubeAPICon.COMMENTS_TTL
+
+    def __init__(self, service: AnalysisService, max_videos: int = 20, workers: int = 4):
+        self.service = service
+        self.max_videos = max_videos
+        self.workers = workers
+
+    def resolve(self, url: str) -> List[str]:
+        """Video IDs of a channel's uploads (newest first) or of a playlist"""
+        kind, ref = parse_collection_url(url)
+        client = self.service.clients.acquire()
+        try:
+            playlist_id = client.fetch_uploads_playlist(ref) if kind == "channel" else ref
+            return client.fetch_playlist_video_ids(playlist_id, self.max_videos)
+        finally:
+            self.service.clients.release(client)
+
+    def analyze_video(self, video_id: str) -> Dict[str, Any]:
+        url = f"https://www.youtube.com/watch?v={video_id}"
+        cache = self.service.cache
+        key = ResultCache.make_key("video_record", video_id)
+        try:
+            record = cache.get(key) if cache is not None else None
+            if record is not None:
+                record["reused"] = True
+                return record
+            record = self.service.record(url, self.service.analyze(url))
+            if cache is not None:
+                cache.set(key, record, ttl=self.RECORD_TTL)
+            return record
+        except Exception as e:
+            return {"url": url, "video_id": video_id, "status": "error", "error": f"{type(e).__name__}: {e}"}
+
+    def analyze(self, url: str) -> Dict[str, Any]:
+        video_ids = self.resolve(url)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            records = list(executor.map(self.analyze_video, video_ids))
+        return {"source": url, "records": records, "aggregate": aggregate(records)}
+
+
+def print_report(report: Dict[str, Any]):
+    summary = report["aggregate"]
+    print(f"\n{summary['videos_analyzed']} videos analyzed, {summary['videos_failed']} failed")
+    shares = summary["sentiment_shares"]
+    print(f"Overall sentiment: positive {shares['positive']:.1%}, negative {shares['negative']:.1%}, "
+          f"neutral {shares['neutral']:.1%}")
+    if summary["positive_share_mean"] is not None:
+        print(f"Positive share per video: mean {summary['positive_share_mean']:.1%}, "
+              f"stdev {summary['positive_share_stdev']:.1%}")
+    print(f"\n{'positive':>9}{'negative':>10}{'comments':>10}  title")
+    for video in summary["videos"]:
+        print(f"{video['positive_share']:>9.1%}{video['negative_share']:>10.1%}{video['comments']:>10}  "
+              f"{video['title']}")
+    for field, heading in (("what_works", "Recurring praise"), ("needs_improvement", "Recurring criticism")):
+        print(f"\n{heading}:")
+        for theme in summary["themes"][field][:10]:
+            print(f"  {theme['theme']} ({theme['videos']} videos)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze and compare the videos of a channel or playlist.")
+    parser.add_argument("url", help="channel or playlist URL, channel ID or @handle")
+    parser.add_argument("--max-videos", type=int, default=20, help="analyze at most this many videos")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="number of videos analyzed at once")
+    parser.add_argument("-o", "--output", help="write the full report (per-video records and aggregate) as JSON")
+    args = parser.parse_args(argv)
+
+    analyzer = ChannelAnalyzer(get_service(workers=args.workers), max_videos=args.max_videos, workers=args.workers)
+    report = analyzer.analyze(args.url)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0 if report["aggregate"]["videos_failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import math
+from array import array
+from typing import Callable, Dict, Iterable, List, Tuple
+
+LABELS = ("positive", "negative", "neutral")
+
+
+def wilson_interval(count: int, n: int, z: float) -> Tuple[float, float]:
+    """Wilson score interval for a proportion; stays inside [0, 1] and behaves at small n and extreme shares"""
+    if n == 0:
+        return 0.0, 1.0
+    share = count / n
+    denominator = 1 + z * z / n
+    centre = (share + z * z / (2 * n)) / denominator
+    half_width = z * math.sqrt(share * (1 - share) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+
+class AdaptiveSampler:
+    """
+    Decides how many comments a video needs. Pages of comments are scored as they arrive and paging stops
+    once the confidence interval of every sentiment share (positive/negative/neutral) is narrower than
+    target_margin either side. Polarized videos, where both positive and negative shares are large, get a
+    tighter margin and a higher cap, since their balance is what the analysis is most often asked about.
+    """
+
+    TARGET_MARGIN = 0.05
+    POLARIZED_MARGIN = 0.03
+    # A video counts as polarized when positive and negative shares both reach this
+    POLARIZATION_THRESHOLD = 0.25
+    CONFIDENCE = 0.9
+    MIN_COMMENTS = 100
+    MAX_COMMENTS = 500
+    POLARIZED_MAX_COMMENTS = 2000
+    _Z_SCORES = {0.8: 1.282, 0.9: 1.645, 0.95: 1.96, 0.98: 2.326, 0.99: 2.576}
+
+    def __init__(self, score: Callable[[List[str]], Iterable[float]], classify: Callable[[float], str],
+                 target_margin: float = TARGET_MARGIN, polarized_margin: float = POLARIZED_MARGIN,
+                 confidence: float = CONFIDENCE, min_comments: int = MIN_COMMENTS,
+                 max_comments: int = MAX_COMMENTS, polarized_max_comments: int = POLARIZED_MAX_COMMENTS):
+        if confidence not in AdaptiveSampler._Z_SCORES:
+            raise ValueError(f"confidence must be one of {sorted(AdaptiveSampler._Z_SCORES)}")
+        self.score = score
+        self.classify = classify
+        self.target_margin = target_margin
+        self.polarized_margin = polarized_margin
+        self.confidence = confidence
+        self.z = AdaptiveSampler._Z_SCORES[confidence]
+        self.min_comments = min_comments
+        self.max_comments = max_comments
+        self.polarized_max_comments = max(polarized_max_comments, max_comments)
+        self.scores = array('f')
+        self.counts = {label: 0 for label in LABELS}
+        self.pages = 0
+        self.stop_reason = None
+
+    @property
+    def sample_size(self) -> int:
+        return len(self.scores)
+
+    @property
+    def fetch_limit(self) -> int:
+        """Most comments that can ever be requested; pass this as max_comments to the page iterator"""
+        return self.polarized_max_comments
+
+    def settings(self) -> Tuple:
+        """Everything that influences where sampling stops, for cache keys"""
+        return (self.target_margin, self.polarized_margin, self.confidence, self.min_comments,
+                self.max_comments, self.polarized_max_comments)
+
+    def add_page(self, comments: List[str]) -> bool:
+        """Score one page of (already filtered) comments. Returns True once enough comments have been seen."""
+        self.pages += 1
+        page_scores = self.score(comments)
+        self.scores.extend(page_scores)
+        for score in page_scores:
+            self.counts[self.classify(score)] += 1
+        return self.done()
+
+    def polarized(self) -> bool:
+        n = self.sample_size or 1
+        return min(self.counts["positive"], self.counts["negative"]) / n >= self.POLARIZATION_THRESHOLD
+
+    def intervals(self) -> Dict[str, Tuple[float, float]]:
+        return {label: wilson_interval(self.counts[label], self.sample_size, self.z) for label in LABELS}
+
+    def margin(self) -> float:
+        """Widest half-width among the label intervals"""
+        return max((high - low) / 2 for low, high in self.intervals().values())
+
+    def done(self) -> bool:
+        if self.stop_reason is not None:
+            return True
+        n = self.sample_size
+        polarized = self.polarized()
+        cap = self.polarized_max_comments if polarized else self.max_comments
+        if n >= cap:
+            self.stop_reason = "cap"
+        elif n >= self.min_comments and self.margin() <= (self.polarized_margin if polarized else self.target_margin):
+            self.stop_reason = "converged"
+        return self.stop_reason is not None
+
+    def estimate(self) -> Dict:
+        """Sample size, shares and their confidence intervals, JSON-serialisable"""
+        n = self.sample_size
+        return {
+            "sample_size": n,
+            "pages": self.pages,
+            "confidence": self.confidence,
+            "margin": round(self.margin(), 4),
+            "shares": {label: round(self.counts[label] / (n or 1), 4) for label in LABELS},
+            "intervals": {label: [round(low, 4), round(high, 4)] for label, (low, high) in self.intervals().items()},
+            "polarized": self.polarized(),
+            # converged: margin reached; cap: stopped at the comment cap; exhausted: the video ran out of comments
+            "stopped": self.stop_reason or "exhausted",
+        }
@@ -0,0 +1,124 @@
+import hashlib
+import random
+import re
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+STOPWORDS = frozenset(
+    "the a an and or but if of to in on at for with from by is are was were be been it this that these those "
+    "i me my you your he she they them we our us its his her their so just very really too also not no yes "
+    "what which who how all any can will would should could do does did have has had am im dont".split()
+)
+TOKEN_REGEX = re.compile(r"[a-z0-9']+")
+_MERSENNE_PRIME = (1 << 61) - 1
+_POSITION_MASK = (1 << 32) - 1
+
+
+class CommentSelector:
+    """
+    Picks a compact, representative subset of comments for an LLM prompt.
+    Comments are ranked by informativeness (distinct content words), near-duplicates are collapsed
+    with MinHash over word shingles, and selection stops once the token budget is full.
+    Beyond the ranking pass, which reads every comment once, only candidates that still fit the remaining
+    budget are re-read and hashed, and the scan stops once not even the shortest comment would fit.
+    """
+
+    def __init__(self, token_budget: int = 4000, max_comment_chars: int = 600, similarity: float = 0.6,
+                 num_perm: int = 32, bands: int = 8, shingle_size: int = 2, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.token_budget = token_budget
+        self.max_comment_chars = max_comment_chars
+        self.similarity = similarity
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)]
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count (about four characters per token for English text)"""
+        return CommentSelector.tokens_for_chars(len(text))
+
+    @staticmethod
+    def tokens_for_chars(length: int) -> int:
+        return length // 4 + 1
+
+    @staticmethod
+    def informativeness(tokens: List[str]) -> int:
+        return len({token for token in tokens if len(token) > 2 and token not in STOPWORDS})
+
+    def _rank_key(self, informativeness: int, length: int, position: int) -> int:
+        """
+        Sort key packed into one int: most informative first, then shorter, then earlier comments.
+        A list of ints takes about a third of the memory of a list of (score, length, position) tuples.
+        """
+        return ((informativeness * (self.max_comment_chars + 1) + self.max_comment_chars - length) << 32
+                | _POSITION_MASK - position)
+
+    def _rank_length(self, rank: int) -> int:
+        """The comment length packed into a _rank_key"""
+        return self.max_comment_chars - (rank >> 32) % (self.max_comment_chars + 1)
+
+    def _shingles(self, tokens: List[str]) -> Set[str]:
+        if len(tokens) <= self.shingle_size:
+            return {' '.join(tokens)}
+        return {' '.join(tokens[i:i + self.shingle_size]) for i in range(len(tokens) - self.shingle_size + 1)}
+
+    def _signature(self, shingles: Set[str]) -> Tuple[int, ...]:
+        # blake2b rather than hash(): str hashes are salted per process, which would make the selection (and
+        # the feedback prompt and its cache key) change from run to run
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=6).digest(), 'big')
+                  for shingle in shingles]
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms)
+
+    def _similar(self, first: Tuple[int, ...], second: Tuple[int, ...]) -> bool:
+        matches = sum(1 for x, y in zip(first, second) if x == y)
+        return matches / len(first) >= self.similarity
+
+    def select(self, comments: Iterable[str], fallback: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Return up to token_budget worth of informative, mutually distinct comments.
+        If the primary comments do not fill the budget, the remainder is filled from fallback.
+        The ranking keeps one packed int per comment (see _rank_key); texts are re-read by position for the
+        few candidates that fit the remaining budget, so CommentStore/CommentView inputs are never copied in full.
+        """
+        selected: List[str] = []
+        buckets: Dict[Tuple[int, Tuple[int, ...]], List[Tuple[int, ...]]] = {}
+        remaining = self.token_budget
+        for pool in (comments, fallback or ()):
+            pool = pool if isinstance(pool, Sequence) else list(pool)
+            ranked = []
+            min_length = self.max_comment_chars
+            for position, comment in enumerate(pool):
+                text = comment.strip()[:self.max_comment_chars]
+                tokens = TOKEN_REGEX.findall(text.lower())
+                if tokens:
+                    ranked.append(self._rank_key(self.informativeness(tokens), len(text), position))
+                    if len(text) < min_length:
+                        min_length = len(text)
+            ranked.sort(reverse=True)
+            min_cost = self.tokens_for_chars(min_length)
+
+            for rank in ranked:
+                if remaining < min_cost:
+                    break  # nothing left in this pool fits; the fallback pool may still hold shorter comments
+                # The length is packed into the rank, so candidates too long for the budget are skipped unread
+                cost = self.tokens_for_chars(self._rank_length(rank))
+                if cost > remaining:
+                    continue
+                position = _POSITION_MASK - (rank & _POSITION_MASK)
+                text = pool[position].strip()[:self.max_comment_chars]
+                tokens = TOKEN_REGEX.findall(text.lower())
+                signature = self._signature(self._shingles(tokens))
+                keys = [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+                if any(self._similar(signature, other) for key in keys for other in buckets.get(key, ())):
+                    continue
+                for key in keys:
+                    buckets.setdefault(key, []).append(signature)
+                selected.append(text)
+                remaining -= cost
+                if remaining <= 0:
+                    return selected
+        return selected
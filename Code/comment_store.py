@@ -0,0 +1,126 @@
+import base64
+from array import array
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+
+def parse_timestamp(published_at: str) -> int:
+    """Seconds since the epoch of an API timestamp such as 2024-01-31T12:00:00Z, 0 when missing"""
+    if not published_at:
+        return 0
+    return int(datetime.fromisoformat(published_at.replace("Z", "+00:00")).timestamp())
+
+
+class CommentStore(Sequence):
+    """
+    Compact, append-only comment collection. All comment texts live in one UTF-8 buffer and all IDs in
+    another, addressed by offset arrays; like counts, timestamps and parent links are typed arrays. A comment
+    costs its encoded size plus about 24 bytes, instead of a str object (about 50 bytes of overhead) and a
+    list slot, and no per-comment Python objects are kept alive.
+    Indexing and iteration decode texts on demand, so the store can be passed wherever a list of comment
+    strings is expected. view() selects a subset without copying any text.
+    """
+
+    def __init__(self):
+        self._text = bytearray()
+        self._text_offsets = array('I', [0])
+        self._ids = bytearray()
+        self._id_offsets = array('I', [0])
+        self.likes = array('I')
+        self.timestamps = array('q')
+        # Index of the top-level comment a reply belongs to; -1 for top-level comments and for replies
+        # whose top-level comment was filtered out
+        self.parents = array('i')
+
+    def append(self, comment_id: str, text: str, likes: int = 0, published_at: str = "", parent: int = -1) -> int:
+        """Add a comment and return its index"""
+        self._text += text.encode('utf-8')
+        self._text_offsets.append(len(self._text))
+        self._ids += comment_id.encode('ascii')
+        self._id_offsets.append(len(self._ids))
+        self.likes.append(likes)
+        self.timestamps.append(parse_timestamp(published_at))
+        self.parents.append(parent)
+        return len(self.likes) - 1
+
+    def __len__(self) -> int:
+        return len(self.likes)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self.text(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("comment index out of range")
+        return self.text(index)
+
+    def __iter__(self) -> Iterator[str]:
+        buffer = memoryview(self._text)
+        offsets = self._text_offsets
+        for i in range(len(self)):
+            yield str(buffer[offsets[i]:offsets[i + 1]], 'utf-8')
+
+    def text(self, index: int) -> str:
+        return str(memoryview(self._text)[self._text_offsets[index]:self._text_offsets[index + 1]], 'utf-8')
+
+    def comment_id(self, index: int) -> str:
+        return self._ids[self._id_offsets[index]:self._id_offsets[index + 1]].decode('ascii')
+
+    def is_reply(self, index: int) -> bool:
+        return self.parents[index] >= 0
+
+    def view(self, indices: Iterable[int]) -> "CommentView":
+        return CommentView(self, indices)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the buffers and arrays"""
+        arrays = (self._text_offsets, self._id_offsets, self.likes, self.timestamps, self.parents)
+        return len(self._text) + len(self._ids) + sum(len(a) * a.itemsize for a in arrays)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serialisable form, for the result cache"""
+        def encode(data) -> str:
+            return base64.b64encode(data).decode('ascii')
+        return {
+            "text": encode(self._text), "text_offsets": encode(self._text_offsets),
+            "ids": encode(self._ids), "id_offsets": encode(self._id_offsets),
+            "likes": encode(self.likes), "timestamps": encode(self.timestamps), "parents": encode(self.parents),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CommentStore":
+        def decode(typecode: str, key: str) -> array:
+            values = array(typecode)
+            values.frombytes(base64.b64decode(data[key]))
+            return values
+        store = cls()
+        store._text = bytearray(base64.b64decode(data["text"]))
+        store._text_offsets = decode('I', "text_offsets")
+        store._ids = bytearray(base64.b64decode(data["ids"]))
+        store._id_offsets = decode('I', "id_offsets")
+        store.likes = decode('I', "likes")
+        store.timestamps = decode('q', "timestamps")
+        store.parents = decode('i', "parents")
+        return store
+
+
+class CommentView(Sequence):
+    """Subset of a CommentStore given by an index array; shares the store's buffers"""
+
+    def __init__(self, store: CommentStore, indices: Iterable[int]):
+        self.store = store
+        self.indices = indices if isinstance(indices, array) else array('I', indices)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self.store.text(i) for i in self.indices[index]]
+        return self.store.text(self.indices[index])
+
+    def __iter__(self) -> Iterator[str]:
+        for i in self.indices:
+            yield self.store.text(i)
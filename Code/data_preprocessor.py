@@ -1,40 +1,176 @@
+import hashlib
 import re
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Union
+from tracing import get_tracer
 
 
 class DataPreprocessor:
     @staticmethod
     def remove_filler_words(transcript: str) -> str:
-        """Removes common filler words from the transcript"""
-        fillers = ["um", "uh", "like", "you know", "so", "actually", "basically", "literally", "right"]
-        pattern = r'\b(' + '|'.join(fillers) + r')\b'
-        cleaned_transcript = re.sub(pattern, '', transcript, flags=re.IGNORECASE)
-        return cleaned_transcript
+        """Removes filler words from the transcript, keeping the ones that carry meaning. Returns lowercase text."""
+        return TranscriptCleaner().remove_fillers(' ' + transcript.lower()).strip()
 
     @staticmethod
-    def clean_transcript(raw_transcript: str) -> str:
-        """Cleans transcript by removing timestamps, filler words, and spam content"""
-        cleaned = re.sub(r'\[\d+:\d+(?::\d+)?]', '', raw_transcript)  # Remove timestamps
-        cleaned = DataPreprocessor.remove_filler_words(cleaned)  # Remove filler words
-        return cleaned.lower()
+    def clean_transcript(raw_transcript: Union[str, Iterable[str]]) -> str:
+        """
+        Cleans transcript by removing timestamps and filler words, collapsing whitespace and lowercasing.
+        Accepts the joined transcript or, preferably, the individual transcript segments.
+        """
+        segments = [raw_transcript] if isinstance(raw_transcript, str) else raw_transcript
+        with get_tracer().span("preprocess.clean_transcript") as span:
+            cleaned = TranscriptCleaner().clean(segments)
+            span["chars"] = len(cleaned)
+            return cleaned
 
     @staticmethod
-    def filter_comments(raw_comments: List[str]) -> List[str]:
-        # Remove duplicate comments
-        seen = set()
-        filtered = []
-        # Remove spam content using regex patterns
-        spam_patterns = [
-            r'\b(free|subscribe|click here|visit our website|spam)\b',
-            r'(http|https)://\S+',  # URLs
-            r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7}\b',  # Emails
-            r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b'  # IP addresses
-        ]
+    def filter_comments(raw_comments: Iterable[str], hash_keys: bool = False) -> List[str]:
+        """Removes spam content and near-duplicate comments"""
+        return list(CommentFilter(hash_keys=hash_keys).feed(raw_comments))
 
+    @staticmethod
+    def iter_filter_comments(raw_comments: Iterable[str], hash_keys: bool = False) -> Iterator[str]:
+        """Streaming variant of filter_comments, yields each comment as soon as it passes the filter"""
+        return CommentFilter(hash_keys=hash_keys).feed(raw_comments)
+
+
+# Transcript patterns run on lowercased text with a space in front of every word. Anchoring each filler
+# pattern on that leading space (instead of a \b) lets the regex engine skip ahead quickly, and removing
+# the space together with the word leaves no double spaces behind.
+TIMESTAMP_REGEX = re.compile(r'\[\d+:\d+(?::\d+)?] ?')
+# Pure disfluencies ("um", "uhh", "hmm") carry no meaning anywhere, so they are always dropped
+DISFLUENCY_REGEX = re.compile(r' (?:um+|uh+m*|erm+|hm+)\b,?')
+# Hedges are dropped at the start of a sentence or when set off by commas ("it was, basically, done"),
+# but kept inside a clause ("is it actually true")
+HEDGES = r'(?:basically|actually|literally)'
+HEDGE_AFTER_SENTENCE_END_REGEX = re.compile(rf' (?<=[.!?] ){HEDGES}\b,?')
+# "like", "so", "right", "you know" and "I mean" are only fillers when set off by commas ("it was, like,
+# huge"), with a comma after them at the start of a sentence ("so, today") or used as a tag question
+# ("that works, right?"). A comma after the word alone is not enough: "turn right, then", "I think so,
+# but" and "what you like, and" keep it. Mid-sentence, the comma in front is removed along with the filler.
+COMMA_FILLERS = rf'(?:like|so|right|you know|i mean|{HEDGES})'
+COMMA_FILLER_REGEX = re.compile(rf'(?:,|(?<=[.!?])) {COMMA_FILLERS} ?,')
+# At the very start of a block that begins a sentence, where there is no punctuation to look behind at
+FILLER_START_REGEX = re.compile(rf' ?(?:{HEDGES}\b,?|{COMMA_FILLERS} ?,)')
+TAG_REGEX = re.compile(r', ?(?:right|you know)(?= ?[.!?]| ?$)')
+MULTI_SPACE_REGEX = re.compile(r' {2,}')
+SPACE_BEFORE_PUNCTUATION_REGEX = re.compile(r' (?=[,.!?])')
+SENTENCE_END = ('.', '!', '?')
+
+
+class TranscriptCleaner:
+    """
+    Cleans a transcript from its segments instead of one big joined string. Segments are gathered into
+    blocks of about BLOCK_CHARS and each block is cleaned and appended to the output, so the extra memory
+    beyond the cleaned text is bounded by the block size. Whether the previous block ended a sentence is
+    carried over for the sentence-initial rules.
+    """
+
+    BLOCK_CHARS = 16384
+
+    def __init__(self, block_chars: int = BLOCK_CHARS):
+        self.block_chars = block_chars
+        self.sentence_start = True
+
+    def remove_fillers(self, text: str) -> str:
+        """Filler removal on lowercased text where every word, including the first, follows a space"""
+        if self.sentence_start:
+            match = FILLER_START_REGEX.match(text)
+            if match:
+                text = text[match.end():]
+        text = DISFLUENCY_REGEX.sub('', text)
+        # The remaining rules need punctuation next to the filler. Auto-generated captions have none,
+        # so a plain substring check lets them skip these scans entirely.
+        if ',' in text:
+            text = COMMA_FILLER_REGEX.sub('', TAG_REGEX.sub('', text))
+        if '. ' in text or '? ' in text or '! ' in text:
+            text = HEDGE_AFTER_SENTENCE_END_REGEX.sub('', text)
+        return text
+
+    def clean_block(self, block: str) -> str:
+        text = ' ' + TIMESTAMP_REGEX.sub('', block.lower().replace('\n', ' '))
+        text = self.remove_fillers(text)
+        if '  ' in text:
+            text = MULTI_SPACE_REGEX.sub(' ', text)
+        if ' ,' in text or ' .' in text or ' ?' in text or ' !' in text:
+            text = SPACE_BEFORE_PUNCTUATION_REGEX.sub('', text)
+        text = text.strip(' ,')
+        if text:
+            self.sentence_start = text.endswith(SENTENCE_END)
+        return text
+
+    def clean(self, segments: Iterable[str]) -> str:
+        cleaned = []
+        block = []
+        size = 0
+        for segment in segments:
+            block.append(segment)
+            size += len(segment)
+            if size >= self.block_chars:
+                cleaned.append(self.clean_block(' '.join(block)))
+                block.clear()
+                size = 0
+        if block:
+            cleaned.append(self.clean_block(' '.join(block)))
+        return ' '.join(filter(None, cleaned))
+
+
+# Spam patterns are compiled once into a single alternation so each comment is scanned only once
+SPAM_PATTERNS = [
+    r'(http|https)://\S+',  # URLs
+    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7}\b',  # Emails
+    r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b',  # IP addresses
+    r'\b(free|subscribe|click here|visit our website|spam)\b',
+]
+SPAM_REGEX = re.compile('|'.join(f'(?:{pattern})' for pattern in SPAM_PATTERNS), re.IGNORECASE)
+# Every spam match contains one of these substrings (or a digit-dot-digit run for IPs). Checking them with
+# plain `in` lets the large majority of clean comments skip the regex entirely.
+SPAM_HINTS = ('://', '@', 'free', 'subscribe', 'click here', 'visit our website', 'spam')
+IP_HINT_REGEX = re.compile(r'\d\.\d')
+
+
+class CommentFilter:
+    """
+    Spam filter with de-duplication on a normalized (case-folded, whitespace-collapsed) form.
+    The seen set persists across feed() calls, so comments can be filtered page by page.
+    """
+
+    def __init__(self, hash_keys: bool = False):
+        self.hash_keys = hash_keys
+        self.seen = set()
+
+    @staticmethod
+    def may_contain_spam(folded: str) -> bool:
+        return any(hint in folded for hint in SPAM_HINTS) or ('.' in folded and IP_HINT_REGEX.search(folded) is not None)
+
+    def normalize(self, folded: str):
+        """Dedupe key for an already case-folded comment"""
+        key = ' '.join(folded.split())
+        if self.hash_keys:
+            # 8-byte digests keep the seen set small on very large comment sets
+            return hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+        return key
+
+    def feed(self, raw_comments: Iterable[str]) -> Iterator[str]:
         for comment in raw_comments:
-            if comment and comment not in seen:
-                for pattern in spam_patterns:
-                    comment = re.sub(pattern, '', comment, flags=re.IGNORECASE)
-                seen.add(comment)
-                filtered.append(comment)
-        return filtered
+            cleaned = self.accept(comment)
+            if cleaned is not None:
+                yield cleaned
+
+    def accept(self, comment: str) -> Optional[str]:
+        """The cleaned comment, or None if it is empty, pure spam or a duplicate of one seen before"""
+        if not comment:
+            return None
+        folded = comment.casefold()
+        if self.may_contain_spam(folded):
+            cleaned = SPAM_REGEX.sub('', comment).strip()
+            folded = cleaned.casefold()
+        else:
+            cleaned = comment.strip()
+        if not cleaned:
+            return None
+        key = self.normalize(folded)
+        if key in self.seen:
+            get_tracer().incr("comments_dropped_total", reason="duplicate")
+            return None
+        self.seen.add(key)
+        return cleaned
@@ -1,13 +1,37 @@
 from youtubeAPICon import YouTubeAPICon
-from data_preprocessor import DataPreprocessor
+from comment_sampler import AdaptiveSampler
+from comment_store import CommentStore
+from data_preprocessor import CommentFilter, DataPreprocessor
+from cache import ResultCache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from tracing import get_tracer
 import re
 
 
 class DataRetrieval:
-    def __init__(self, api_key: str, video_url: str):
-        self.api = YouTubeAPICon(api_key)
+    # Long transcripts are summarized map-reduce style, so multi-hour videos are supported
+    MAX_DURATION_HOURS = 12
+    MAX_COMMENTS = 500
+    MIN_COMMENTS = 100
+
+    def __init__(self, api_key: str, video_url: str, cache: Optional[ResultCache] = None,
+                 max_duration_hours: float = MAX_DURATION_HOURS, max_comments: int = MAX_COMMENTS,
+                 api: Optional[YouTubeAPICon] = None, include_replies: bool = False):
+        self.api = api if api is not None else YouTubeAPICon(api_key, cache=cache)
         self.video_url = video_url
         self.video_id = None
+        self.max_duration_hours = max_duration_hours
+        self.max_comments = max_comments
+        self.include_replies = include_replies
+
+    @staticmethod
+    def parse_duration(duration: str) -> int:
+        """Convert an ISO 8601 duration such as PT1H2M3S into seconds"""
+        match = re.fullmatch(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?", duration)
+        if not match:
+            raise ValueError(f"Unrecognised video duration: {duration}")
+        days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+        return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
 
     def validate_url(self):
         """Validate YouTube URL and extract video ID"""
@@ -21,10 +45,16 @@ class DataRetrieval:
         """Fetch and return video metadata"""
         if not self.video_id:
             raise RuntimeError("URL validation required before data retrieval")
-        metadata = self.api.fetch_metadata(self.video_id)
+        with get_tracer().span("fetch.metadata", video_id=self.video_id):
+            metadata = self.api.fetch_metadata(self.video_id)
         # Enforce operational constraints
-        if metadata["duration"].startswith("PT") and "H" in metadata["duration"]:  # Checks for 1+ hour videos
-            raise ValueError("Video exceeds the allowed duration of 1 hour")
+        if DataRetrieval.parse_duration(metadata["duration"]) > self.max_duration_hours * 3600:
+            raise ValueError(f"Video exceeds the allowed duration of {self.max_duration_hours:g} hours")
+        # The statistics count replies too, so this only rejects videos that certainly fall short. The exact
+        # check on the fetched comments in get_comments stays as the backstop.
+        comment_count = metadata.get("comments")
+        if comment_count is not None and int(comment_count) < DataRetrieval.MIN_COMMENTS:
+            raise ValueError(f"Video does not have the required minimum of {DataRetrieval.MIN_COMMENTS} comments")
 
         return metadata
 
@@ -32,16 +62,92 @@ class DataRetrieval:
         """Fetch and return cleaned transcript"""
         if not self.video_id:
             raise RuntimeError("URL validation required before data retrieval")
-        raw_transcript = self.api.fetch_transcript(self.video_id)
-        return DataPreprocessor.clean_transcript(raw_transcript)
+        with get_tracer().span("fetch.transcript", video_id=self.video_id) as span:
+            # Segments are cleaned before they are joined, see TranscriptCleaner
+            transcript = self.api.fetch_transcript(self.video_id, cleaner=DataPreprocessor.clean_transcript)
+            span["chars"] = len(transcript)
+        return transcript
+
+    def get_comments(self, on_page: Optional[Callable[[List[str]], None]] = None) -> CommentStore:
+        """
+        Fetch and return filtered comments (and replies, with include_replies) as a CommentStore, filtering
+        each page as soon as it arrives. The filtered store is cached in its compact form.
+        on_page receives the comments each fetched page added, while the following pages are still being
+        prefetched. It is not called when the comments come from the cache.
+        """
+        if not self.video_id:
+            raise RuntimeError("URL validation required before data retrieval")
+        cache = self.api.cache
+        cache_key = ResultCache.make_key("comment_store", self.video_id, self.max_comments, self.include_replies)
+        cached = cache.get(cache_key) if cache is not None else None
+        # Filtering consumes the page stream, so this span covers paging, filtering and on_page together
+        with get_tracer().span("fetch.comments", video_id=self.video_id) as span:
+            if cached is not None:
+                comments, raw_count = CommentStore.from_dict(cached["comments"]), cached["raw"]
+            else:
+                pages = self.api.iter_comment_threads(self.video_id, self.max_comments, self.include_replies)
+                comments = CommentStore()
+                raw_count = kept = 0
+                for page in self._collect(pages, comments):
+                    raw_count += len(page)
+                    if on_page is not None:
+                        on_page(comments[kept:])
+                    kept = len(comments)
+            span.update(raw=raw_count, kept=len(comments), bytes=comments.nbytes())
 
-    def get_comments(self) -> list[str]:
-        """Fetch and return filtered comments"""
+        if raw_count < DataRetrieval.MIN_COMMENTS:
+            raise ValueError(f"Video does not have the required minimum of {DataRetrieval.MIN_COMMENTS} comments")
+        if cached is None and cache is not None:
+            cache.set(cache_key, {"comments": comments.to_dict(), "raw": raw_count}, ttl=YouTubeAPICon.COMMENTS_TTL)
+        return comments
+
+    def sample_comments(self, sampler: AdaptiveSampler) -> CommentStore:
+        """
+        Fetch filtered comments page by page, scoring each page with the sampler, and stop paging as soon as
+        the sampler has a precise enough estimate. The scores stay on the sampler, in the order of the
+        returned comments. Videos with few comments are not rejected; the sampler reports how uncertain
+        their estimate is instead.
+        """
         if not self.video_id:
             raise RuntimeError("URL validation required before data retrieval")
-        raw_comments = self.api.fetch_comments(self.video_id, max_comments=500)
+        cache = self.api.cache
+        cache_key = ResultCache.make_key("comment_sample", self.video_id, sampler.settings(), self.include_replies)
+        cached = cache.get(cache_key) if cache is not None else None
+        # No prefetch: a page fetched ahead would be wasted quota whenever the sampler stops
+        pages = cached if cached is not None else self.api.iter_comment_threads(
+            self.video_id, sampler.fetch_limit, self.include_replies, prefetch=0
+        )
+
+        comments = CommentStore()
+        raw_pages = []
+        with get_tracer().span("fetch.comments", video_id=self.video_id, adaptive=True) as span:
+            for page in self._collect(pages, comments):
+                raw_pages.append(page)
+                if sampler.add_page(comments[sampler.sample_size:]):
+                    break
+            span.update(raw=sum(len(page) for page in raw_pages), kept=len(comments), pages=sampler.pages,
+                        margin=round(sampler.margin(), 4))
 
-        if len(raw_comments) < 100:
-            raise ValueError("Video does not have the required minimum of 100 comments")
+        if not comments:
+            raise ValueError("Video has no comments to analyze")
+        if cached is None and cache is not None:
+            cache.set(cache_key, raw_pages, ttl=YouTubeAPICon.COMMENTS_TTL)
+        return comments
 
-        return DataPreprocessor.filter_comments(raw_comments)
+    @staticmethod
+    def _collect(pages: Iterable[List[Dict[str, Any]]], comments: CommentStore) -> Iterator[List[Dict[str, Any]]]:
+        """Filter each page of comment records into the store, then yield the raw page"""
+        comment_filter = CommentFilter(hash_keys=True)
+        for page in pages:
+            # Replies follow their top-level comment on the same page
+            threads = {}
+            for record in page:
+                text = comment_filter.accept(record["text"])
+                if text is None:
+                    continue
+                parent_id = record.get("parent_id")
+                index = comments.append(record["id"], text, record["likes"], record["published_at"],
+                                        threads.get(parent_id, -1) if parent_id else -1)
+                if not parent_id:
+                    threads[record["id"]] = index
+            yield page
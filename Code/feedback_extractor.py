@@ -1,14 +1,34 @@
-import google.generativeai as genai
-from typing import List, Dict, Optional
+import json
+import re
+from typing import Any, Callable, Dict, Optional, Sequence
 from base_analyzer import BaseAnalyzer
+from cache import ResultCache
+from comment_selector import CommentSelector
+from rate_limiter import RateLimiter
+
+
+# Partial reply to COMBINED_PROMPT: a field's string value up to the closing quote or the end of the text so far
+PARTIAL_FIELD_REGEX = {
+    field: re.compile(rf'"{field}"\s*:\s*"((?:[^"\\]|\\.)*)') for field in ("what_works", "needs_improvement")
+}
+INCOMPLETE_ESCAPE_REGEX = re.compile(r'\\u[0-9a-fA-F]{0,3}$')
+# google.api_core exception names for a request the model rejected as malformed (e.g. it does not support
+# response_mime_type). The separate prompts do not ask for JSON, so these are worth retrying that way.
+REQUEST_SHAPE_ERROR_NAMES = {"InvalidArgument", "FailedPrecondition"}
 
 
 class FeedbackExtractor(BaseAnalyzer):
     """Processes comments using Gemini AI to extract 'What’s Working' and 'Needs Improvement' feedback."""
 
-    def __init__(self, api_key: str):
-        super().__init__(api_key)
-        genai.configure(api_key=self.api_key)
+    MODEL_NAME = "gemini-2.5-pro-exp-03-25"
+
+    def __init__(self, api_key: str, cache: Optional[ResultCache] = None, model: Any = None,
+                 selector: Optional[CommentSelector] = None, single_request: bool = True,
+                 limiter: Optional[RateLimiter] = None):
+        super().__init__(api_key, cache, limiter)
+        self.model = model
+        self.single_request = single_request
+        self.selector = selector or CommentSelector()
 
     WORKS_PROMPT = (
         "You are a professional video content analyst. Given the following YouTube comments about a video, "
@@ -35,18 +55,143 @@ class FeedbackExtractor(BaseAnalyzer):
         "not your simulation.\n\nComments:\n{comments}"
     )
 
-    def analyze(self, comments: List[str]) -> Optional[Dict[str, str]]:
+    COMBINED_PROMPT = (
+        "You are a professional video content analyst. Given the following YouTube comments about a video, "
+        "produce two analyses.\n"
+        "1. what_works: the most praised elements, extracting deeper feedback trends that reflect what the audience "
+        "appreciated.\n"
+        "2. needs_improvement: the most commonly mentioned criticisms or suggestions for improvement, extracting "
+        "deeper insight into what viewers found lacking.\n"
+        "For each, list bullet points. Each bullet point must start with a bolded subtopic (e.g., **Clarity**) "
+        "followed by a concise 1–2 sentence explanation. Do not quote comments directly. Do not provide introductory "
+        "or concluding sentences. Do not group points or use themes. Be direct, clear, and objective. Note only use "
+        "insights from comments, not your simulation.\n"
+        "Respond with a single JSON object with exactly two string fields, \"what_works\" and "
+        "\"needs_improvement\", each holding the bullet list as markdown text.\n\n"
+        "{comments}"
+    )
+
+    def analyze(self, comments: Sequence[str], sentiment: Optional[Dict[str, Sequence[str]]] = None,
+                on_partial: Optional[Callable[[Dict[str, str]], None]] = None) -> Optional[Dict[str, str]]:
+        """
+        Extract feedback from a token-budgeted selection of comments. When SentimentAnalyzer output is given,
+        praise is drawn from positive comments and criticism from negative ones (topped up with neutral).
+        With on_partial, the reply is streamed and on_partial receives both feedback texts so far after every chunk.
+        """
+        if sentiment and "positive" in sentiment:
+            works_text = "\n".join(self.selector.select(sentiment["positive"], fallback=sentiment["neutral"]))
+            needs_text = "\n".join(self.selector.select(sentiment["negative"], fallback=sentiment["neutral"]))
+        else:
+            works_text = needs_text = "\n".join(self.selector.select(comments))
+        extract = self._extract_combined if self.single_request else self._extract
+        return self._cached(
+            "feedback", lambda: extract(works_text, needs_text, on_partial),
+            FeedbackExtractor.MODEL_NAME,
+            ResultCache.fingerprint(FeedbackExtractor.WORKS_PROMPT + FeedbackExtractor.IMPROVEMENT_PROMPT +
+                                    FeedbackExtractor.COMBINED_PROMPT),
+            ResultCache.fingerprint(works_text), ResultCache.fingerprint(needs_text)
+        )
+
+    def _get_model(self):
+        return self._load_model(FeedbackExtractor.MODEL_NAME)
+
+    @staticmethod
+    def parse_combined_response(text: str) -> Dict[str, str]:
+        """Parse and validate the JSON reply to COMBINED_PROMPT. Raises ValueError if it is malformed."""
+        text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text.strip())
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Feedback response is not valid JSON: {e}") from e
+        if not isinstance(data, dict):
+            raise ValueError("Feedback response is not a JSON object")
+        feedback = {}
+        for field in ("what_works", "needs_improvement"):
+            value = data.get(field)
+            if isinstance(value, list) and all(isinstance(item, str) for item in value):
+                value = "\n".join(item if item.lstrip().startswith(("* ", "- ")) else f"*   {item}" for item in value)
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f"Feedback response is missing '{field}'")
+            feedback[field] = value.strip()
+        return feedback
+
+    @staticmethod
+    def parse_partial_response(text: str) -> Dict[str, str]:
+        """Best-effort view of an incomplete streamed reply to COMBINED_PROMPT, for progressive display"""
+        feedback = {"what_works": "", "needs_improvement": ""}
+        for field, regex in PARTIAL_FIELD_REGEX.items():
+            match = regex.search(text)
+            if match:
+                try:
+                    feedback[field] = json.loads('"' + INCOMPLETE_ESCAPE_REGEX.sub('', match.group(1)) + '"')
+                except json.JSONDecodeError:
+                    pass
+        return feedback
+
+    def _generate(self, model: Any, prompt: str, on_chunk: Optional[Callable[[str], None]], **kwargs: Any) -> str:
+        if on_chunk is None:
+            return self._generate_text(model, prompt, **kwargs)
+        return self._stream_text(model, prompt, on_chunk, **kwargs)
+
+    def _extract_combined(self, works_text: str, needs_text: str,
+                          on_partial: Optional[Callable[[Dict[str, str]], None]] = None) -> Optional[Dict[str, str]]:
+        """Ask for both feedback lists in one structured request, falling back to two calls if parsing fails"""
+        if works_text == needs_text:
+            comments_text = f"Comments:\n{works_text}"
+        else:
+            comments_text = (f"Comments to use for what_works:\n{works_text}\n\n"
+                             f"Comments to use for needs_improvement:\n{needs_text}")
+        if on_partial is None:
+            on_chunk = None
+        else:
+            chunks = []
+
+            def on_chunk(chunk: str):
+                chunks.append(chunk)
+                on_partial(FeedbackExtractor.parse_partial_response("".join(chunks)))
+
+        # Only a reply that cannot be parsed, or a request the model rejects, is retried as two separate
+        # requests. Quota and transient errors have already been retried by the limiter and would only fail again.
+        try:
+            model = self._get_model()
+            response_text = self._generate(
+                model, FeedbackExtractor.COMBINED_PROMPT.format(comments=comments_text), on_chunk,
+                generation_config={"response_mime_type": "application/json"}
+            )
+        except Exception as e:
+            if type(e).__name__ not in REQUEST_SHAPE_ERROR_NAMES:
+                print(f"[ERROR] Feedback extraction failed: {e}")
+                return None
+            print(f"[WARN] Combined feedback request rejected, falling back to separate requests: {e}")
+            return self._extract(works_text, needs_text, on_partial)
+        try:
+            return FeedbackExtractor.parse_combined_response(response_text)
+        except ValueError as e:
+            print(f"[WARN] Combined feedback reply could not be parsed, falling back to separate requests: {e}")
+            return self._extract(works_text, needs_text, on_partial)
+
+    def _extract(self, works_text: str, needs_text: str,
+                 on_partial: Optional[Callable[[Dict[str, str]], None]] = None) -> Optional[Dict[str, str]]:
+        feedback = {"what_works": "", "needs_improvement": ""}
+
+        def streamer(field: str) -> Optional[Callable[[str], None]]:
+            if on_partial is None:
+                return None
+
+            def on_chunk(chunk: str):
+                feedback[field] += chunk
+                on_partial(dict(feedback))
+
+            return on_chunk
+
         try:
-            model = genai.GenerativeModel("gemini-2.5-pro-exp-03-25")
-            comments_text = "\n".join(comments)
+            model = self._get_model()
             # Generate positive feedback
-            prompt_working = FeedbackExtractor.WORKS_PROMPT.format(comments=comments_text)
-            res_working = model.generate_content(prompt_working)
-            what_works = res_working.text.strip()
+            prompt_working = FeedbackExtractor.WORKS_PROMPT.format(comments=works_text)
+            what_works = self._generate(model, prompt_working, streamer("what_works"))
             # Generate improvement feedback
-            prompt_needs = FeedbackExtractor.IMPROVEMENT_PROMPT.format(comments=comments_text)
-            res_needs = model.generate_content(prompt_needs)
-            needs_improvement = res_needs.text.strip()
+            prompt_needs = FeedbackExtractor.IMPROVEMENT_PROMPT.format(comments=needs_text)
+            needs_improvement = self._generate(model, prompt_needs, streamer("needs_improvement"))
             print(what_works,needs_improvement)
             return {"what_works": what_works, "needs_improvement": needs_improvement}
         except Exception as e:
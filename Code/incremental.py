@@ -0,0 +1,195 @@
+"""
+Incremental re-analysis: re-checking a video only fetches and scores comments posted since the last run.
+
+    python incremental.py <youtube url> [<youtube url> ...]
+"""
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+from data_preprocessor import CommentFilter
+from data_retrieval import DataRetrieval
+from feedback_extractor import FeedbackExtractor
+from sentiment_analyzer import SentimentAnalyzer
+from tracing import get_tracer
+from youtubeAPICon import YouTubeAPICon
+
+
+class VideoState:
+    """Everything remembered about a video between runs, stored as one JSON file per video."""
+
+    # Recent comments kept per sentiment label, used as the prompt sample when feedback is refreshed
+    SAMPLE_SIZE = 200
+
+    def __init__(self, video_id: str):
+        self.video_id = video_id
+        self.seen_ids = set()
+        self.watermark = ""  # publishedAt of the newest comment seen (ISO 8601 strings sort chronologically)
+        # Set when a run hit max_comments before reaching the previous watermark: the page cursor to resume
+        # from and the watermark the unfetched window ends at. The next run finishes it before anything else.
+        self.backlog: Optional[Dict[str, str]] = None
+        self.counts = {label: 0 for label in SentimentAnalyzer.LABELS}
+        self.samples: Dict[str, List[str]] = {label: [] for label in SentimentAnalyzer.LABELS}
+        self.feedback: Optional[Dict[str, str]] = None
+        self.new_since_feedback = 0
+
+    @staticmethod
+    def path_for(state_dir: str, video_id: str) -> str:
+        return os.path.join(state_dir, f"{video_id}.json")
+
+    @classmethod
+    def load(cls, state_dir: str, video_id: str) -> "VideoState":
+        state = cls(video_id)
+        path = cls.path_for(state_dir, video_id)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            state.seen_ids = set(data["seen_ids"])
+            state.watermark = data["watermark"]
+            state.backlog = data.get("backlog")  # absent in state files written before backlogs existed
+            state.counts = data["counts"]
+            state.samples = data["samples"]
+            state.feedback = data["feedback"]
+            state.new_since_feedback = data["new_since_feedback"]
+        return state
+
+    def save(self, state_dir: str):
+        os.makedirs(state_dir, exist_ok=True)
+        path = VideoState.path_for(state_dir, self.video_id)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "video_id": self.video_id,
+                "seen_ids": sorted(self.seen_ids),
+                "watermark": self.watermark,
+                "backlog": self.backlog,
+                "counts": self.counts,
+                "samples": self.samples,
+                "feedback": self.feedback,
+                "new_since_feedback": self.new_since_feedback,
+            }, f)
+        os.replace(tmp_path, path)  # never leave a half-written state file behind
+
+    def add_sample(self, label: str, comment: str):
+        sample = self.samples[label]
+        sample.insert(0, comment)
+        del sample[VideoState.SAMPLE_SIZE:]
+
+
+class IncrementalAnalyzer:
+    """
+    Keeps per-video state (seen comment IDs, newest publishedAt, running sentiment counts, last feedback).
+    Each update pages through comments newest-first and stops at the first one older than the watermark,
+    scores only the new comments, and refreshes the LLM feedback only once refresh_threshold new
+    comments have accumulated. An update reads about max_comments comments at most; when more than that
+    arrived since the last run, the rest is kept as a backlog and fetched by the following runs.
+    """
+
+    def __init__(self, api: YouTubeAPICon, feedback_extractor: Optional[FeedbackExtractor] = None,
+                 sentiment_analyzer: Optional[SentimentAnalyzer] = None, state_dir: str = "state",
+                 refresh_threshold: int = 50, max_comments: int = DataRetrieval.MAX_COMMENTS):
+        self.api = api
+        self.feedback_extractor = feedback_extractor
+        self.sentiment_analyzer = sentiment_analyzer or SentimentAnalyzer()
+        self.state_dir = state_dir
+        self.refresh_threshold = refresh_threshold
+        self.max_comments = max_comments
+
+    def fetch_new_comments(self, state: VideoState) -> List[Dict[str, Any]]:
+        """
+        Unseen comments, reading at most max_comments. An unfinished backlog is read first. If the newest
+        comments alone exceed the budget, the window between them and the watermark becomes the backlog.
+        The first run only reads the newest max_comments, like a full analysis, and leaves no backlog.
+        """
+        new_comments = []
+        budget = self.max_comments
+        if state.backlog is not None:
+            until = state.backlog["until"]
+            cursor, read = self._fetch_window(state, new_comments, state.backlog["cursor"], until, budget)
+            state.backlog = None if cursor is None else {"cursor": cursor, "until": until}
+            budget -= read
+            if state.backlog is not None or budget <= 0:
+                return new_comments
+        cursor, _ = self._fetch_window(state, new_comments, None, state.watermark, budget)
+        if cursor is not None and state.watermark:
+            state.backlog = {"cursor": cursor, "until": state.watermark}
+        return new_comments
+
+    def _fetch_window(self, state: VideoState, new_comments: List[Dict[str, Any]], cursor: Optional[str],
+                      until: str, budget: int) -> Tuple[Optional[str], int]:
+        """
+        Page newest-first from cursor (None: from the newest comment), adding unseen comments to new_comments,
+        until a comment older than `until` or `budget` comments have been read. Returns the cursor to resume
+        from, None once the window is complete, and the number of comments read.
+        """
+        read = 0
+        resume = None
+        for resume, page in self.api.iter_comment_records(state.video_id, max_comments=budget, order="time",
+                                                          page_token=cursor):
+            for record in page:
+                if record["published_at"] < until:
+                    return None, read  # everything from here on is older than the window
+                read += 1
+                if record["id"] not in state.seen_ids:
+                    new_comments.append(record)
+        return resume, read
+
+    def update(self, video_id: str) -> Dict[str, Any]:
+        state = VideoState.load(self.state_dir, video_id)
+        first_run = not state.seen_ids
+        with get_tracer().span("incremental.update", video_id=video_id) as span:
+            new_comments = self.fetch_new_comments(state)
+            span["new_comments"] = len(new_comments)
+
+            filtered = CommentFilter().feed(record["text"] for record in new_comments)
+            sentiment = self.sentiment_analyzer.analyze(filtered)
+            # Oldest first, so the newest comments end up at the front of each sample
+            for label in SentimentAnalyzer.LABELS:
+                state.counts[label] += len(sentiment[label])
+                for comment in reversed(sentiment[label]):
+                    state.add_sample(label, comment)
+
+            for record in new_comments:
+                state.seen_ids.add(record["id"])
+                state.watermark = max(state.watermark, record["published_at"])
+            state.new_since_feedback += sum(len(sentiment[label]) for label in SentimentAnalyzer.LABELS)
+
+            refreshed = False
+            if self.feedback_extractor is not None and (
+                    state.feedback is None or state.new_since_feedback >= self.refresh_threshold):
+                feedback = self.feedback_extractor.analyze([], sentiment=state.samples)
+                if feedback is not None:
+                    state.feedback = feedback
+                    state.new_since_feedback = 0
+                    refreshed = True
+            state.save(self.state_dir)
+
+        return {
+            "video_id": video_id,
+            "first_run": first_run,
+            "new_comments": len(new_comments),
+            "counts": dict(state.counts),
+            "feedback": state.feedback,
+            "feedback_refreshed": refreshed,
+        }
+
+
+def main(argv=None) -> int:
+    urls = sys.argv[1:] if argv is None else argv
+    if not urls:
+        print(__doc__.strip())
+        return 2
+    api = YouTubeAPICon(os.getenv("YOUTUBE_API_KEY"))
+    analyzer = IncrementalAnalyzer(api, FeedbackExtractor(os.getenv("GEMINI_API_KEY")))
+    for url in urls:
+        dr = DataRetrieval(None, url, api=api)
+        dr.validate_url()
+        result = analyzer.update(dr.video_id)
+        refreshed = "refreshed" if result["feedback_refreshed"] else "unchanged"
+        print(f"{result['video_id']}: {result['new_comments']} new comments, counts {result['counts']}, "
+              f"feedback {refreshed}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
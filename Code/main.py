@@ -1,5 +1,12 @@
+import argparse
 from user_interface import YouTubeApp
 
 if __name__ == "__main__":
-    app = YouTubeApp()
+    parser = argparse.ArgumentParser(description="YouTube video analysis GUI.")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="load the API SDKs on the first analysis instead of in the background after start-up")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="fetch comments only until the sentiment shares are precise enough")
+    args = parser.parse_args()
+    app = YouTubeApp(preload=not args.no_preload, adaptive=args.adaptive)
     app.mainloop()
@@ -0,0 +1,203 @@
+import threading
+import time
+from array import array
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Optional
+from comment_sampler import AdaptiveSampler
+from data_retrieval import DataRetrieval
+from youtubeAPICon import YouTubeAPICon
+from summarizer import Summarizer
+from sentiment_analyzer import SentimentAnalyzer
+from feedback_extractor import FeedbackExtractor
+from cache import ResultCache
+from rate_limiter import RateLimiter
+from tracing import get_tracer
+
+NO_FEEDBACK = {
+    "what_works": "No feedback available.",
+    "needs_improvement": "No improvement suggestions."
+}
+
+
+class Stage:
+    """A named unit of work that runs once all of its dependencies have produced a result."""
+
+    def __init__(self, name: str, func: Callable[..., Any], depends_on: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+
+class Pipeline:
+    """
+    Runs a graph of stages, starting each stage as soon as its inputs are ready.
+    Independent branches run concurrently, so the total time is close to the slowest branch.
+    stage_limits maps stage names to semaphores shared between pipelines, bounding how many
+    instances of a stage run at once across concurrent analyses. on_result, if given, is called
+    with (stage name, result) as each stage finishes, before the rest of the graph is done.
+    """
+
+    def __init__(self, max_workers: int = 4, run_id: Optional[str] = None,
+                 stage_limits: Optional[Dict[str, threading.Semaphore]] = None,
+                 on_result: Optional[Callable[[str, Any], None]] = None):
+        self.max_workers = max_workers
+        self.run_id = run_id
+        self.stage_limits = stage_limits or {}
+        self.on_result = on_result
+        self.stages: Dict[str, Stage] = {}
+        self.timings: Dict[str, float] = {}
+
+    def add_stage(self, name: str, func: Callable[..., Any], depends_on: Iterable[str] = ()) -> "Pipeline":
+        """Register a stage. The results of depends_on are passed to func as positional arguments, in order."""
+        if name in self.stages:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        stage = Stage(name, func, depends_on)
+        for dep in stage.depends_on:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = stage
+        return self
+
+    def _run_stage(self, stage: Stage, args: list) -> Any:
+        with self.stage_limits.get(stage.name) or nullcontext():
+            return self._timed_stage(stage, args)
+
+    def _timed_stage(self, stage: Stage, args: list) -> Any:
+        start = time.perf_counter()
+        try:
+            with get_tracer().span(stage.name, kind="stage", run_id=self.run_id):
+                return stage.func(*args)
+        finally:
+            self.timings[stage.name] = time.perf_counter() - start
+
+    def run(self) -> Dict[str, Any]:
+        """Execute every stage and return a mapping of stage name to result. Wall-clock times land in self.timings."""
+        self.timings = {}
+        results: Dict[str, Any] = {}
+        pending = dict(self.stages)
+        running = {}
+        start = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(dep in results for dep in stage.depends_on):
+                        args = [results[dep] for dep in stage.depends_on]
+                        running[executor.submit(self._run_stage, stage, args)] = name
+                        del pending[name]
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    if self.on_result is not None:
+                        self.on_result(name, results[name])
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.timings["total"] = time.perf_counter() - start
+        return results
+
+
+def build_analysis_pipeline(video_url: str, youtube_api_key: Optional[str], gemini_api_key: Optional[str],
+                            cache: Optional[ResultCache] = None, api: Optional[YouTubeAPICon] = None,
+                            model: Any = None, limiter: Optional[RateLimiter] = None,
+                            max_comments: int = DataRetrieval.MAX_COMMENTS,
+                            summarizer: Optional[Summarizer] = None,
+                            sentiment_analyzer: Optional[SentimentAnalyzer] = None,
+                            feedback_extractor: Optional[FeedbackExtractor] = None,
+                            stage_limits: Optional[Dict[str, threading.Semaphore]] = None,
+                            on_update: Optional[Callable[[str, Any], None]] = None,
+                            sampling: Optional[Dict[str, Any]] = None, include_replies: bool = False) -> Pipeline:
+    """
+    Build the video analysis graph:
+    metadata -> (transcript -> summary) | (comments -> sentiment, feedback)
+    Metadata runs first so the duration and comment-count checks fail fast before any quota is spent on the
+    other stages; a video the statistics already show to have too few comments makes no Gemini request.
+    The summary is then generated while the comments are still being paged.
+    api, model and limiter override the default clients (the benchmarks pass local fakes), and
+    already constructed analyzers can be passed in to reuse warm instances across runs.
+    on_update(stage, value) receives each stage result as soon as it is ready and, while the summary
+    and feedback replies are streamed from Gemini, their text so far.
+    sampling enables adaptive comment sampling: comments are fetched only until the sentiment shares are
+    known to within a margin, see AdaptiveSampler (whose keyword arguments it holds; {} for the defaults).
+    The sentiment result then carries the sample size and confidence intervals under "sample".
+    include_replies adds reply threads to the comments. Comments travel through the graph as one CommentStore,
+    and the per-label sentiment groups are views over it.
+    """
+    dr = DataRetrieval(youtube_api_key, video_url, cache=cache, max_comments=max_comments, api=api,
+                       include_replies=include_replies)
+    dr.validate_url()
+    summarizer = summarizer or Summarizer(gemini_api_key, cache, model=model, limiter=limiter)
+    sentiment_analyzer = sentiment_analyzer or SentimentAnalyzer()
+    feedback_extractor = feedback_extractor or FeedbackExtractor(gemini_api_key, cache, model=model, limiter=limiter)
+
+    pipeline = Pipeline(run_id=dr.video_id, stage_limits=stage_limits, on_result=on_update)
+    pipeline.video_id = dr.video_id
+    pipeline.add_stage("metadata", dr.get_metadata)
+    pipeline.add_stage("transcript", lambda _: dr.get_transcript(), depends_on=["metadata"])
+    if sampling is None:
+        # Each page is scored as soon as it is filtered, while the next pages are still being prefetched
+        scores = array('f')
+        pipeline.add_stage("comments", lambda _: dr.get_comments(on_page=lambda page: scores.extend(
+            sentiment_analyzer.score(page))), depends_on=["metadata"])
+
+        def analyze_sentiment(comments):
+            # The scores (kept for the result store) sit next to the per-label lists either way
+            if len(scores) == len(comments):
+                return SentimentAnalyzer.from_scores(comments, scores, keep_text=True)
+            # Cached comments arrive all at once; analyze_batch spreads large sets over a process pool
+            return sentiment_analyzer.analyze_batch(comments, keep_text=True)
+    else:
+        sampler = AdaptiveSampler(sentiment_analyzer.score, SentimentAnalyzer.classify, **sampling)
+        pipeline.add_stage("comments", lambda _: dr.sample_comments(sampler), depends_on=["metadata"])
+
+        def analyze_sentiment(comments):
+            # Comments were scored page by page while sampling, so nothing is scored twice
+            sentiment = SentimentAnalyzer.from_scores(comments, sampler.scores, keep_text=True)
+            sentiment["sample"] = sampler.estimate()
+            return sentiment
+    if on_update is None:
+        summarize = summarizer.analyze
+        extract_feedback = feedback_extractor.analyze
+    else:
+        def summarize(transcript):
+            return summarizer.analyze(transcript, on_partial=lambda text: on_update("summary", text))
+
+        def extract_feedback(comments, sentiment):
+            return feedback_extractor.analyze(
+                comments, sentiment, on_partial=lambda feedback: on_update("feedback", feedback)
+            )
+    pipeline.add_stage("summary", summarize, depends_on=["transcript"])
+    pipeline.add_stage("sentiment", analyze_sentiment, depends_on=["comments"])
+    pipeline.add_stage("feedback", extract_feedback, depends_on=["comments", "sentiment"])
+    return pipeline
+
+
+def analyze_video(video_url: str, youtube_api_key: Optional[str], gemini_api_key: Optional[str],
+                  cache: Optional[ResultCache] = None, **options: Any) -> Dict[str, Any]:
+    """
+    Run the whole analysis for one video. The result holds every stage output plus video_id and timings.
+    Extra options are passed on to build_analysis_pipeline.
+    """
+    pipeline = build_analysis_pipeline(video_url, youtube_api_key, gemini_api_key, cache=cache, **options)
+    results = pipeline.run()
+    if results["feedback"] is None:
+        results["feedback"] = dict(NO_FEEDBACK)
+    results["video_id"] = pipeline.video_id
+    results["timings"] = dict(pipeline.timings)
+    return results
+
+
+def results_to_record(url: str, results: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact JSON-serialisable view of analyze_video() output"""
+    return {
+        "url": url,
+        "status": "ok",
+        "video_id": results["video_id"],
+        "metadata": results["metadata"],
+        "summary": results["summary"],
+        "sentiment": SentimentAnalyzer.counts(results["sentiment"]),
+        "sampling": results["sentiment"].get("sample"),
+        "feedback": results["feedback"],
+        "timings": results["timings"],
+    }
@@ -0,0 +1,174 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+from tracing import get_tracer
+
+# HTTP statuses worth retrying: throttling and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# 403 reasons the YouTube Data API uses for short-term throttling (as opposed to an exhausted daily quota)
+RETRYABLE_403_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+# google.api_core exception names raised by the Gemini SDK for throttling and transient failures
+RETRYABLE_ERROR_NAMES = {"ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+                         "DeadlineExceeded", "GatewayTimeout"}
+
+
+class QuotaExceededError(ConnectionError):
+    """Raised when a call cannot be made within the service budget in a reasonable time."""
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to `capacity` tokens, refilled continuously at `refill_rate` per second."""
+
+    def __init__(self, capacity: float, refill_rate: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def try_acquire(self, cost: float = 1.0) -> float:
+        """Take `cost` tokens if available and return 0, otherwise return the seconds until they will be"""
+        self._refill()
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        if self.refill_rate <= 0:
+            return float("inf")
+        return (cost - self.tokens) / self.refill_rate
+
+
+class RateLimiter:
+    """
+    Shared per-service budgets and retry scheduling for every outbound API call.
+    Calls wait for tokens from their service's bucket, and retryable failures are retried with
+    exponential backoff and full jitter, honouring Retry-After when the server sends one.
+    The clock, sleep and random source are injectable so behaviour can be tested without real waiting.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 rng: Callable[[], float] = random.random, max_retries: int = 5, base_delay: float = 1.0,
+                 max_delay: float = 60.0, max_wait: float = 300.0):
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.retries: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, service: str, capacity: float, per_seconds: float) -> "RateLimiter":
+        """Allow `capacity` units per `per_seconds` for a service (e.g. 10000 quota units per 86400 s)"""
+        with self._lock:
+            self.buckets[service] = TokenBucket(capacity, capacity / per_seconds, self.clock)
+        return self
+
+    def acquire(self, service: str, cost: float = 1.0):
+        """Block until `cost` units of the service budget are available. Unconfigured services are unlimited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                bucket = self.buckets.get(service)
+                if bucket is None:
+                    return
+                wait = bucket.try_acquire(cost)
+            if wait == 0:
+                return
+            if cost > bucket.capacity or waited + wait > self.max_wait:
+                raise QuotaExceededError(f"{service} budget exhausted; next capacity in {wait:.0f}s")
+            self.sleep(wait)
+            waited += wait
+
+    def backoff_delay(self, attempt: int, error: Exception) -> float:
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_wait)
+        return self.rng() * min(self.max_delay, self.base_delay * (2 ** attempt))
+
+    def call(self, service: str, func: Callable[..., Any], *args, cost: float = 1.0, **kwargs) -> Any:
+        """Run func(*args, **kwargs) within the service budget, retrying transient failures"""
+        attempt = 0
+        while True:
+            self.acquire(service, cost)
+            get_tracer().incr("api_calls_total", service=service)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                with self._lock:
+                    self.retries[service] = self.retries.get(service, 0) + 1
+                get_tracer().incr("api_retries_total", service=service)
+                self.sleep(self.backoff_delay(attempt, e))
+                attempt += 1
+
+
+def _status_of(error: Exception) -> Optional[int]:
+    resp = getattr(error, "resp", None)  # googleapiclient HttpError
+    status = getattr(resp, "status", None) or getattr(error, "code", None) or getattr(error, "status_code", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, QuotaExceededError):
+        return False
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES or isinstance(error, (TimeoutError, ConnectionResetError)):
+        return True
+    status = _status_of(error)
+    if status == 403:
+        content = getattr(error, "content", b"") or b""
+        text = content.decode("utf-8", "ignore") if isinstance(content, bytes) else str(content)
+        return any(reason in text for reason in RETRYABLE_403_REASONS)
+    return status in RETRYABLE_STATUS
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read a Retry-After header (seconds or HTTP date) from an HTTP error, if present"""
+    headers = getattr(error, "resp", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers or not hasattr(headers, "get"):
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# Default budgets. Both can be overridden with environment variables to match the project's quota.
+YOUTUBE_QUOTA_PER_DAY = int(os.getenv("YOUTUBE_QUOTA_PER_DAY", "10000"))
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60"))
+
+_default_limiter = None
+_default_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter shared by every YouTubeAPICon and Gemini analyzer"""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+            _default_limiter.configure("youtube", YOUTUBE_QUOTA_PER_DAY, 24 * 60 * 60)
+            _default_limiter.configure("gemini", GEMINI_REQUESTS_PER_MINUTE, 60)
+        return _default_limiter
@@ -0,0 +1,44 @@
+import json
+import os
+from datetime import datetime
+
+
+def render_text(record):
+    """Plain-text report of one stored run (results_to_record layout)"""
+    metadata = record.get("metadata") or {}
+    sentiment = record.get("sentiment") or {}
+    lines = ["YouTube Feedback Report", "=======================", ""]
+    if metadata.get("title"):
+        lines.append(f"Video: {metadata['title']} ({record.get('url') or record['video_id']})")
+    if record.get("created_at"):
+        lines.append(f"Analyzed: {datetime.fromtimestamp(record['created_at']).strftime('%Y-%m-%d %H:%M:%S')}")
+    if sentiment:
+        lines.append("Sentiment: " + ", ".join(f"{label} {count}" for label, count in sentiment.items()))
+    sampling = record.get("sampling")
+    if sampling:
+        lines.append(f"Sample: {sampling['sample_size']} comments, shares within ±{sampling['margin']:.1%} "
+                     f"at {sampling['confidence']:.0%} confidence")
+    if len(lines) > 3:
+        lines.append("")
+    if record.get("summary"):
+        lines += ["Summary:", record["summary"].strip(), ""]
+    lines += ["What’s Working:", record["feedback"]["what_works"].strip(), ""]
+    lines += ["Needs Improvement:", record["feedback"]["needs_improvement"].strip()]
+    return "\n".join(lines) + "\n"
+
+
+def save_report(record, output_dir="reports", fmt="txt"):
+    """Write a run as feedback_<video>_<timestamp>.txt or .json and return the path"""
+    os.makedirs(output_dir, exist_ok=True)
+    created = datetime.fromtimestamp(record["created_at"]) if record.get("created_at") else datetime.now()
+    filename = f"feedback_{record['video_id']}_{created.strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    filepath = os.path.join(output_dir, filename)
+
+    with open(filepath, "w", encoding="utf-8") as f:
+        if fmt == "json":
+            json.dump(record, f, ensure_ascii=False, indent=2)
+        else:
+            f.write(render_text(record))
+
+    print(f"Report saved at: {filepath}")
+    return filepath
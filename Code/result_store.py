@@ -0,0 +1,260 @@
+"""
+Indexed store of every completed analysis: metadata, summary, sentiment counts and per-comment scores,
+feedback and stage timings, one row per run. Text and JSON reports are rendered from it on demand.
+
+    python result_store.py history <video ID or URL> [--limit 20]
+    python result_store.py channel <channel ID> [--limit 20]
+    python result_store.py export <video ID, URL or run ID> [--format txt|json] [--output-dir reports]
+"""
+import argparse
+import atexit
+import json
+import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+from report_writer import save_report
+from tracing import get_tracer
+
+# Columns returned by the query API, in record (results_to_record) layout
+RUN_COLUMNS = ("run_id, video_id, url, created_at, channel_id, title, summary, positive, negative, neutral, "
+               "feedback, metadata, timings, sampling")
+
+
+class ResultStore:
+    """
+    SQLite store of analysis runs, indexed by video, channel and time.
+    add() only queues a run; a single writer thread commits whatever has queued up in one transaction,
+    so concurrent workers never wait on each other's commits. Queries see committed runs; call flush()
+    first to include runs added a moment ago.
+    """
+
+    MAX_BATCH = 200
+
+    def __init__(self, path: str = "results/analysis_results.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id TEXT PRIMARY KEY, video_id TEXT NOT NULL, url TEXT, created_at REAL NOT NULL, "
+            "channel_id TEXT, title TEXT, summary TEXT, positive INTEGER, negative INTEGER, neutral INTEGER, "
+            "feedback TEXT, metadata TEXT, timings TEXT, sampling TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        if "sampling" not in columns:  # stores created before adaptive sampling was added
+            self._conn.execute("ALTER TABLE runs ADD COLUMN sampling TEXT")
+        # float32 compound scores in comment order, kept apart so history queries never read them
+        self._conn.execute("CREATE TABLE IF NOT EXISTS comment_scores (run_id TEXT PRIMARY KEY, scores BLOB NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_video ON runs (video_id, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_channel ON runs (channel_id, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at)")
+        self._conn.commit()
+        self._pending = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def add(self, record: Dict[str, Any], scores: Optional[Iterable[float]] = None) -> str:
+        """Queue one successful results_to_record() record, plus its per-comment scores, and return its run ID"""
+        run_id = uuid.uuid4().hex[:16]
+        metadata = record.get("metadata") or {}
+        sentiment = record.get("sentiment") or {}
+        row = (
+            run_id, record["video_id"], record.get("url"), time.time(), metadata.get("channel_id"),
+            metadata.get("title"), record.get("summary"), sentiment.get("positive", 0),
+            sentiment.get("negative", 0), sentiment.get("neutral", 0), json.dumps(record.get("feedback")),
+            json.dumps(metadata), json.dumps(record.get("timings") or {}), json.dumps(record.get("sampling"))
+        )
+        blob = array('f', scores).tobytes() if scores is not None else None
+        self._pending.put((row, blob))
+        return run_id
+
+    def flush(self):
+        """Block until every queued run is committed"""
+        self._pending.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._pending.put(None)
+            self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+    def _write_loop(self):
+        while True:
+            item = self._pending.get()
+            batch = [item]
+            while item is not None and len(batch) < self.MAX_BATCH:
+                try:
+                    item = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+            items = [entry for entry in batch if entry is not None]
+            try:
+                if items:
+                    self._write(items)
+            except sqlite3.Error as e:
+                print(f"[ERROR] Result store write failed: {e}")
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+            if len(items) < len(batch):
+                return
+
+    def _write(self, items: List[tuple]):
+        with get_tracer().span("result_store_write", kind="store", runs=len(items)), self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT INTO runs ({RUN_COLUMNS}) VALUES ({', '.join('?' * 14)})",
+                    [row for row, _ in items]
+                )
+                self._conn.executemany(
+                    "INSERT INTO comment_scores (run_id, scores) VALUES (?, ?)",
+                    [(row[0], blob) for row, blob in items if blob is not None]
+                )
+        get_tracer().incr("result_store_runs_total", len(items))
+
+    def _query(self, where: str, params: tuple, limit: Optional[int]) -> List[Dict[str, Any]]:
+        sql = f"SELECT {RUN_COLUMNS} FROM runs WHERE {where} ORDER BY created_at DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [ResultStore._to_record(row) for row in rows]
+
+    @staticmethod
+    def _to_record(row: tuple) -> Dict[str, Any]:
+        (run_id, video_id, url, created_at, _, _, summary, positive, negative, neutral,
+         feedback, metadata, timings, sampling) = row
+        return {
+            "run_id": run_id,
+            "url": url,
+            "status": "ok",
+            "video_id": video_id,
+            "created_at": created_at,
+            "metadata": json.loads(metadata),
+            "summary": summary,
+            "sentiment": {"positive": positive, "negative": negative, "neutral": neutral},
+            "sampling": json.loads(sampling) if sampling else None,
+            "feedback": json.loads(feedback),
+            "timings": json.loads(timings),
+        }
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        runs = self._query("run_id = ?", (run_id,), 1)
+        return runs[0] if runs else None
+
+    def history(self, video_id: str, limit: Optional[int] = None,
+                since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Runs of one video, newest first, optionally only those created after the `since` timestamp"""
+        if since is None:
+            return self._query("video_id = ?", (video_id,), limit)
+        return self._query("video_id = ? AND created_at > ?", (video_id, since), limit)
+
+    def latest(self, video_id: str) -> Optional[Dict[str, Any]]:
+        runs = self.history(video_id, limit=1)
+        return runs[0] if runs else None
+
+    def channel_history(self, channel_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Runs of every video of a channel, newest first"""
+        return self._query("channel_id = ?", (channel_id,), limit)
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return self._query("1", (), limit)
+
+    def scores(self, run_id: str) -> Optional[array]:
+        """Per-comment compound scores of a run, or None if the run was stored without them"""
+        with self._lock:
+            row = self._conn.execute("SELECT scores FROM comment_scores WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        scores = array('f')
+        scores.frombytes(row[0])
+        return scores
+
+    def export(self, run_id: str, fmt: str = "txt", output_dir: str = "reports") -> str:
+        """Write a stored run as a text or JSON report and return the file path"""
+        self.flush()
+        record = self.get(run_id)
+        if record is None:
+            raise ValueError(f"Unknown run: {run_id}")
+        if fmt == "json":
+            scores = self.scores(run_id)
+            record["scores"] = scores.tolist() if scores is not None else None
+        return save_report(record, output_dir=output_dir, fmt=fmt)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ResultStore:
+    """Process-wide store; queued runs are committed when the process exits"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore()
+            atexit.register(_store.close)
+        return _store
+
+
+def _resolve(store: ResultStore, ref: str) -> Optional[Dict[str, Any]]:
+    """A run ID, or the latest run of a video ID or URL"""
+    run = store.get(ref)
+    if run is not None:
+        return run
+    match = re.search(r"(?:[?&]v=|youtu\.be/)([a-zA-Z0-9_-]{11})", ref)
+    return store.latest(match.group(1) if match else ref)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Query and export stored analysis results.")
+    parser.add_argument("--store", default="results/analysis_results.sqlite3", help="result store path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    history = commands.add_parser("history", help="list the runs of a video")
+    history.add_argument("video", help="video ID or URL")
+    history.add_argument("--limit", type=int, default=20)
+    channel = commands.add_parser("channel", help="list the runs of a channel's videos")
+    channel.add_argument("channel_id")
+    channel.add_argument("--limit", type=int, default=20)
+    export = commands.add_parser("export", help="write a report for a run (default: a video's latest run)")
+    export.add_argument("ref", help="run ID, video ID or URL")
+    export.add_argument("--format", choices=("txt", "json"), default="txt")
+    export.add_argument("--output-dir", default="reports")
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.store)
+    if args.command == "export":
+        run = _resolve(store, args.ref)
+        if run is None:
+            print(f"No stored runs for {args.ref}")
+            return 1
+        print(store.export(run["run_id"], args.format, args.output_dir))
+        return 0
+
+    if args.command == "history":
+        run = _resolve(store, args.video)
+        runs = store.history(run["video_id"], limit=args.limit) if run else []
+    else:
+        runs = store.channel_history(args.channel_id, limit=args.limit)
+    print(f"{'run':<18}{'created':<21}{'positive':>9}{'negative':>9}{'neutral':>9}  title")
+    for run in runs:
+        created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["created_at"]))
+        sentiment = run["sentiment"]
+        print(f"{run['run_id']:<18}{created:<21}{sentiment['positive']:>9}{sentiment['negative']:>9}"
+              f"{sentiment['neutral']:>9}  {run['metadata'].get('title', '')}")
+    return 0 if runs else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
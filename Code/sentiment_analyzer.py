@@ -1,26 +1,103 @@
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from typing import List, Dict
+from array import array
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Union
 from base_analyzer import BaseAnalyzer
+from comment_store import CommentStore
+
+_worker_analyzer = None
+
+
+def _init_worker():
+    """Load the VADER lexicon once per worker process"""
+    global _worker_analyzer
+    _worker_analyzer = SentimentIntensityAnalyzer()
+
+
+def _score_chunk(chunk: List[str]) -> List[float]:
+    return [_worker_analyzer.polarity_scores(comment)['compound'] for comment in chunk]
 
 
 class SentimentAnalyzer(BaseAnalyzer):
     """Classifies comments as positive, negative, or neutral using VADER."""
 
+    LABELS = ("positive", "negative", "neutral")
+    # Below this many comments, process start-up costs more than it saves
+    PARALLEL_THRESHOLD = 5000
+    CHUNK_SIZE = 1000
+
     def __init__(self):
         super().__init__()
         self.analyzer = SentimentIntensityAnalyzer()
 
-    def analyze(self, comments: List[str]) -> Dict[str, List[str]]:
+    @staticmethod
+    def classify(score: float) -> str:
+        if score >= 0.05:
+            return "positive"
+        elif score <= -0.05:
+            return "negative"
+        return "neutral"
+
+    def analyze(self, comments: Iterable[str]) -> Dict[str, List[str]]:
         """Classifies comments into sentiment categories using VADER."""
         sentiment_results = {"positive": [], "negative": [], "neutral": []}
 
         for comment in comments:
             score = self.analyzer.polarity_scores(comment)['compound']
-            if score >= 0.05:
-                sentiment_results["positive"].append(comment)
-            elif score <= -0.05:
-                sentiment_results["negative"].append(comment)
-            else:
-                sentiment_results["neutral"].append(comment)
+            sentiment_results[SentimentAnalyzer.classify(score)].append(comment)
 
         return sentiment_results
+
+    def analyze_batch(self, comments: Iterable[str], processes: Optional[int] = None,
+                      chunk_size: int = CHUNK_SIZE, keep_text: bool = False) -> Dict[str, Union[array, Dict, List]]:
+        """
+        Scores a large comment set, spreading chunks of comments across a process pool.
+        Returns a compact result: {"scores": array of float32 compound scores, "counts": {label: n}}.
+        With keep_text=True the per-label comment lists are included as well.
+        A CommentStore is scored in place (chunks are only decoded as they are sent to the pool).
+        """
+        comments = comments if isinstance(comments, Sequence) else list(comments)
+        if processes == 1 or len(comments) < SentimentAnalyzer.PARALLEL_THRESHOLD:
+            scores = self.score(comments)
+        else:
+            scores = array('f')
+            chunks = (comments[i:i + chunk_size] for i in range(0, len(comments), chunk_size))
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+                for chunk_scores in pool.map(_score_chunk, chunks):
+                    scores.extend(chunk_scores)
+        return SentimentAnalyzer.from_scores(comments, scores, keep_text=keep_text)
+
+    def score(self, comments: Iterable[str]) -> array:
+        """float32 compound scores of the comments, in order"""
+        return array('f', (self.analyzer.polarity_scores(comment)['compound'] for comment in comments))
+
+    @staticmethod
+    def from_scores(comments: Sequence, scores: array, keep_text: bool = False) -> Dict[str, Union[array, Dict, List]]:
+        """
+        analyze_batch() result for comments that were already scored, e.g. page by page while sampling.
+        For a CommentStore the per-label comments are CommentViews over it rather than copied lists.
+        """
+        counts = {label: 0 for label in SentimentAnalyzer.LABELS}
+        for score in scores:
+            counts[SentimentAnalyzer.classify(score)] += 1
+        result = {"scores": scores, "counts": counts}
+        if keep_text and isinstance(comments, CommentStore):
+            indices = {label: array('I') for label in SentimentAnalyzer.LABELS}
+            for index, score in enumerate(scores):
+                indices[SentimentAnalyzer.classify(score)].append(index)
+            for label in SentimentAnalyzer.LABELS:
+                result[label] = comments.view(indices[label])
+        elif keep_text:
+            for label in SentimentAnalyzer.LABELS:
+                result[label] = []
+            for comment, score in zip(comments, scores):
+                result[SentimentAnalyzer.classify(score)].append(comment)
+        return result
+
+    @staticmethod
+    def counts(sentiment: Dict) -> Dict[str, int]:
+        """Per-label counts from either an analyze() or an analyze_batch() result"""
+        if "counts" in sentiment:
+            return dict(sentiment["counts"])
+        return {label: len(sentiment.get(label, [])) for label in SentimentAnalyzer.LABELS}
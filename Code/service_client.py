@@ -0,0 +1,38 @@
+"""
+HTTP client for a running analysis_service. Kept apart from the service module so that clients load only the
+standard library, not the YouTube and Gemini SDKs.
+"""
+import json
+import time
+from typing import Any, Dict, Optional
+from urllib import request as urllib_request
+
+
+class ServiceClient:
+    """Small HTTP client for a running analysis service"""
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8765"):
+        self.base_url = base_url.rstrip("/")
+
+    def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        req = urllib_request.Request(self.base_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+        with urllib_request.urlopen(req) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def submit(self, video_url: str) -> str:
+        return self._request("POST", "/jobs", {"url": video_url})["job_id"]
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll: float = 1.0) -> Dict[str, Any]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.status(job_id)
+            if job["status"] in ("done", "error"):
+                return job
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Job {job_id} did not finish within {timeout}s")
+            time.sleep(poll)
@@ -1,13 +1,30 @@
-import google.generativeai as genai
-from typing import Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
 from base_analyzer import BaseAnalyzer
+from cache import ResultCache
+from rate_limiter import RateLimiter
 
 class Summarizer(BaseAnalyzer):
-    """Handles summarization of a video transcript using Google Gemini AI."""
+    """
+    Handles summarization of a video transcript using Google Gemini AI.
+    Transcripts longer than chunk_chars are summarized map-reduce style: chunks are summarized
+    concurrently (at most max_concurrency at a time) and the partial summaries are then combined.
+    With on_partial, the user-facing reply (the single summary, or the final combine step) is streamed and
+    on_partial receives the summary text so far after every chunk.
+    """
 
-    def __init__(self, api_key: str):
-        super().__init__(api_key)
-        genai.configure(api_key=self.api_key)
+    MODEL_NAME = "gemini-2.5-pro-exp-03-25"
+    CHUNK_CHARS = 24000  # roughly 6k tokens per map prompt
+    MAX_CONCURRENCY = 4
+
+    def __init__(self, api_key: str, cache: Optional[ResultCache] = None, model: Any = None,
+                 chunk_chars: int = CHUNK_CHARS, max_concurrency: int = MAX_CONCURRENCY,
+                 limiter: Optional[RateLimiter] = None):
+        super().__init__(api_key, cache, limiter)
+        self.model = model
+        self.chunk_chars = chunk_chars
+        self.max_concurrency = max_concurrency
 
     SUMMARY_PROMPT = (
         "You are an expert content summarizer. Your task is to read the following YouTube video transcript "
@@ -16,12 +33,120 @@ class Summarizer(BaseAnalyzer):
         "The summary should be clear, well-structured, and engaging. Provide plain text only.\n\n"
         "Transcript:\n{transcript}"
     )
-    def analyze(self, cleaned_transcript: str) -> Optional[str]:
+
+    CHUNK_PROMPT = (
+        "You are an expert content summarizer. The following text is part {index} of {total} of a longer YouTube "
+        "video transcript. Summarize the key points, topics and important details of this part only. "
+        "Provide plain text only.\n\n"
+        "Transcript part:\n{transcript}"
+    )
+
+    COMBINE_PROMPT = (
+        "You are an expert content summarizer. The following are summaries of consecutive parts of a YouTube "
+        "video transcript, group {index} of {total} of such groups. Combine them into a single summary of this "
+        "stretch of the video that keeps its key points, topics and important details. Provide plain text only.\n\n"
+        "Part summaries:\n{summaries}"
+    )
+
+    REDUCE_PROMPT = (
+        "You are an expert content summarizer. The following are summaries of consecutive parts of one YouTube "
+        "video transcript. Combine them into a single concise, insightful summary of the whole video. Focus on key "
+        "points, main topics, and any important details or takeaways."
+        "The summary should be clear, well-structured, and engaging. Provide plain text only.\n\n"
+        "Part summaries:\n{summaries}"
+    )
+
+    def analyze(self, cleaned_transcript: str, on_partial: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        return self._cached(
+            "summary", lambda: self._summarize(cleaned_transcript, on_partial),
+            Summarizer.MODEL_NAME,
+            ResultCache.fingerprint(Summarizer.SUMMARY_PROMPT + Summarizer.CHUNK_PROMPT + Summarizer.COMBINE_PROMPT
+                                    + Summarizer.REDUCE_PROMPT),
+            self.chunk_chars, ResultCache.fingerprint(cleaned_transcript)
+        )
+
+    def _get_model(self):
+        return self._load_model(Summarizer.MODEL_NAME)
+
+    def _generate(self, model, prompt: str, on_partial: Optional[Callable[[str], None]] = None) -> str:
+        if on_partial is None:
+            return self._generate_text(model, prompt)
+        chunks = []
+
+        def on_chunk(chunk: str):
+            chunks.append(chunk)
+            on_partial("".join(chunks))
+
+        return self._stream_text(model, prompt, on_chunk)
+
+    @staticmethod
+    def split_transcript(transcript: str, max_chars: int) -> List[str]:
+        """Split on sentence boundaries (falling back to word boundaries) into chunks of at most max_chars"""
+        chunks = []
+        current = []
+        size = 0
+        for sentence in re.split(r'(?<=[.!?])\s+', transcript.strip()):
+            # Auto-generated captions often have no punctuation, so long "sentences" are split on words
+            pieces = [sentence] if len(sentence) <= max_chars else sentence.split()
+            for piece in pieces:
+                if current and size + len(piece) + 1 > max_chars:
+                    chunks.append(' '.join(current))
+                    current = []
+                    size = 0
+                current.append(piece)
+                size += len(piece) + 1
+        if current:
+            chunks.append(' '.join(current))
+        return chunks
+
+    @staticmethod
+    def group_summaries(summaries: List[str], max_chars: int) -> List[List[str]]:
+        """Pack consecutive summaries into groups whose joined text is at most max_chars (a longer one stands alone)"""
+        groups = []
+        size = 0
+        for summary in summaries:
+            if groups and size + len(summary) + 2 <= max_chars:
+                groups[-1].append(summary)
+                size += len(summary) + 2
+            else:
+                groups.append([summary])
+                size = len(summary)
+        return groups
+
+    def _summarize(self, cleaned_transcript: str, on_partial: Optional[Callable[[str], None]] = None) -> Optional[str]:
         try:
-            model = genai.GenerativeModel("gemini-2.5-pro-exp-03-25")
-            prompt = Summarizer.SUMMARY_PROMPT.format(transcript=cleaned_transcript)
-            response = model.generate_content(prompt)
-            return response.text.strip()
+            model = self._get_model()
+            if len(cleaned_transcript) <= self.chunk_chars:
+                prompt = Summarizer.SUMMARY_PROMPT.format(transcript=cleaned_transcript)
+                return self._generate(model, prompt, on_partial)
+            return self._map_reduce(model, cleaned_transcript, on_partial)
         except Exception as e:
             print(f"[ERROR] Summary generation failed: {e}")
             return None
+
+    def _generate_all(self, model, prompts: List[str]) -> List[str]:
+        """Generate a reply to every prompt, at most max_concurrency at a time, in prompt order"""
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return list(executor.map(lambda prompt: self._generate(model, prompt), prompts))
+
+    def _map_reduce(self, model, transcript: str, on_partial: Optional[Callable[[str], None]] = None) -> str:
+        chunks = Summarizer.split_transcript(transcript, self.chunk_chars)
+        partials = self._generate_all(model, [
+            Summarizer.CHUNK_PROMPT.format(index=i + 1, total=len(chunks), transcript=chunk)
+            for i, chunk in enumerate(chunks)
+        ])
+        summaries = "\n\n".join(partials)
+        # Very long videos can produce more partial text than fits one prompt. Groups of partial summaries are
+        # then combined until they fit, as long as combining still merges at least two of them somewhere.
+        while len(summaries) > self.chunk_chars:
+            groups = Summarizer.group_summaries(partials, self.chunk_chars)
+            if len(groups) == len(partials):
+                break
+            # A group holding a single summary is passed on as it is
+            combined = iter(self._generate_all(model, [
+                Summarizer.COMBINE_PROMPT.format(index=i + 1, total=len(groups), summaries="\n\n".join(group))
+                for i, group in enumerate(groups) if len(group) > 1
+            ]))
+            partials = [next(combined) if len(group) > 1 else group[0] for group in groups]
+            summaries = "\n\n".join(partials)
+        return self._generate(model, Summarizer.REDUCE_PROMPT.format(summaries=summaries), on_partial)
@@ -0,0 +1,95 @@
+"""
+Background comment paging (YouTubeAPICon._prefetch) against the latency-injecting fake commentThreads endpoint.
+Run from the Code directory: python -m unittest discover tests
+"""
+import threading
+import time
+import unittest
+from benchmarks.fakes import FakeTranscriptApi, FakeYouTube
+from data_retrieval import DataRetrieval
+from rate_limiter import RateLimiter
+from youtubeAPICon import YouTubeAPICon
+
+VIDEO_ID = "abcdefghijk"
+
+
+def make_api(youtube: FakeYouTube) -> YouTubeAPICon:
+    return YouTubeAPICon(None, limiter=RateLimiter(), youtube=youtube, transcript_api=FakeTranscriptApi(1))
+
+
+def page_requests(youtube: FakeYouTube) -> int:
+    return youtube.calls.get("commentThreads.list", 0)
+
+
+class FailingYouTube(FakeYouTube):
+    """Fails the request for the page after `fail_after` successful ones"""
+
+    def __init__(self, fail_after: int, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_after = fail_after
+
+    def _threads_list(self, params):
+        if page_requests(self) >= self.fail_after:
+            raise RuntimeError("page request failed")
+        return super()._threads_list(params)
+
+
+class PrefetchTest(unittest.TestCase):
+
+    def test_pages_arrive_in_order(self):
+        youtube = FakeYouTube(950, page_latency=0.005)
+        pages = list(make_api(youtube).iter_comment_threads(VIDEO_ID, max_comments=950, prefetch=3))
+        self.assertEqual([len(page) for page in pages], [100] * 9 + [50])
+        self.assertEqual([record["id"] for page in pages for record in page], [f"c{i}" for i in range(950)])
+
+    def test_matches_unbuffered_paging(self):
+        api = make_api(FakeYouTube(420, page_latency=0.002))
+        buffered = list(api.iter_comment_threads(VIDEO_ID, max_comments=420, prefetch=2))
+        unbuffered = list(api.iter_comment_threads(VIDEO_ID, max_comments=420, prefetch=0))
+        self.assertEqual(buffered, unbuffered)
+
+    def test_buffer_is_bounded(self):
+        youtube = FakeYouTube(3000, page_latency=0.002)
+        pages = make_api(youtube).iter_comment_threads(VIDEO_ID, max_comments=3000, prefetch=2)
+        next(pages)
+        time.sleep(0.3)  # plenty of time for the worker to run ahead if nothing held it back
+        # The page handed out, two buffered pages and one fetched page waiting for buffer space
+        self.assertLessEqual(page_requests(youtube), 1 + 2 + 1)
+        pages.close()
+
+    def test_worker_exception_reaches_consumer(self):
+        youtube = FailingYouTube(2, comment_count=1000, page_latency=0.002)
+        pages = make_api(youtube).iter_comment_threads(VIDEO_ID, max_comments=1000, prefetch=2)
+        received = []
+        with self.assertRaisesRegex(RuntimeError, "page request failed"):
+            for page in pages:
+                received.append(page)
+        self.assertEqual(len(received), 2)
+
+    def test_close_stops_worker(self):
+        youtube = FakeYouTube(5000, page_latency=0.01)
+        threads_before = set(threading.enumerate())
+        pages = make_api(youtube).iter_comment_threads(VIDEO_ID, max_comments=5000, prefetch=2)
+        next(pages)
+        pages.close()
+        time.sleep(0.3)
+        requests = page_requests(youtube)
+        time.sleep(0.2)
+        self.assertEqual(page_requests(youtube), requests)
+        self.assertLess(requests, 10)
+        # Only threads started by this test count; ones left by earlier tests may still be winding down
+        self.assertEqual([thread for thread in threading.enumerate() if thread not in threads_before], [])
+
+    def test_pages_are_handed_on_before_the_last_one_arrives(self):
+        youtube = FakeYouTube(600, page_latency=0.02)
+        dr = DataRetrieval(None, f"https://www.youtube.com/watch?v={VIDEO_ID}", api=make_api(youtube),
+                           max_comments=600)
+        dr.validate_url()
+        requests_seen = []
+        comments = dr.get_comments(on_page=lambda page: requests_seen.append((page_requests(youtube), len(page))))
+        self.assertLess(requests_seen[0][0], 6)  # scoring of the first page started while paging continued
+        self.assertEqual(sum(count for _, count in requests_seen), len(comments))
+
+
+if __name__ == "__main__":
+    unittest.main()
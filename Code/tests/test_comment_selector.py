@@ -0,0 +1,56 @@
+"""
+Budgeted, near-duplicate-free comment selection for the feedback prompt.
+Run from the Code directory: python -m unittest discover tests
+"""
+import unittest
+from collections.abc import Sequence
+from benchmarks.fakes import synthetic_comments
+from comment_selector import CommentSelector
+
+
+class CountingComments(Sequence):
+    """A comment list that counts how often each comment is read"""
+
+    def __init__(self, comments):
+        self.comments = comments
+        self.reads = 0
+
+    def __len__(self):
+        return len(self.comments)
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return self.comments[index]
+
+
+class CommentSelectorTest(unittest.TestCase):
+
+    def test_stays_within_budget(self):
+        selected = CommentSelector(token_budget=500).select(synthetic_comments(2000, 42))
+        self.assertLessEqual(sum(map(CommentSelector.estimate_tokens, selected)), 500)
+        self.assertGreater(sum(map(CommentSelector.estimate_tokens, selected)), 450)
+
+    def test_near_duplicates_are_collapsed(self):
+        comments = ["The audio mixing in the second half was far too quiet to follow"] * 5 + [
+            "The audio mixing in the second half was far too quiet to follow!!",
+            "Loved the animated diagrams explaining how the scheduler picks threads",
+        ]
+        self.assertEqual(CommentSelector().select(comments), [
+            "The audio mixing in the second half was far too quiet to follow",
+            "Loved the animated diagrams explaining how the scheduler picks threads",
+        ])
+
+    def test_only_candidates_that_fit_are_reread(self):
+        comments = CountingComments(synthetic_comments(20000, 42))
+        selected = CommentSelector(token_budget=1000).select(comments)
+        # One read per comment for the ranking, then about one per selected comment
+        self.assertLess(comments.reads - len(comments), 5 * len(selected))
+
+    def test_fallback_fills_the_rest_of_the_budget(self):
+        selected = CommentSelector(token_budget=40).select(
+            ["Great explanation of the scheduler"], fallback=["Audio was too quiet in places"])
+        self.assertEqual(selected, ["Great explanation of the scheduler", "Audio was too quiet in places"])
+
+
+if __name__ == "__main__":
+    unittest.main()
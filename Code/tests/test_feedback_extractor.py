@@ -0,0 +1,145 @@
+"""
+Combined (single-request) feedback extraction and its reply parsing, with local stub models in place of Gemini.
+Run from the Code directory: python -m unittest discover tests
+"""
+import contextlib
+import io
+import json
+import unittest
+from benchmarks.fakes import FakeGeminiModel, FakeResponse
+from feedback_extractor import FeedbackExtractor
+from rate_limiter import RateLimiter
+
+COMMENTS = [
+    "The explanation of recursion was really clear and the examples helped a lot",
+    "Audio was too quiet in the second half, had to turn it all the way up",
+    "Great pacing, never boring, and the editing is clean",
+    "The background music is too loud and distracting during the code walkthrough",
+]
+
+
+class InvalidJsonModel(FakeGeminiModel):
+    """Replies to the combined prompt with text that is not JSON, and to the separate prompts with bullet lists"""
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        with self._lock:
+            self.prompts.append(prompt)
+        if "JSON object" in prompt:
+            return FakeResponse("Sure! Here is the analysis: what works is the clarity.")
+        return FakeResponse(f"*   **Point {len(self.prompts)}**: from a separate request.")
+
+
+class ResourceExhausted(Exception):
+    """Named like the google.api_core exception the Gemini SDK raises for a 429"""
+
+
+class InvalidArgument(Exception):
+    """Named like the google.api_core exception the Gemini SDK raises for a malformed request"""
+
+
+class FailingCombinedModel(InvalidJsonModel):
+    """Raises `error` for the combined prompt and answers the separate prompts like InvalidJsonModel"""
+
+    def __init__(self, error: Exception):
+        super().__init__()
+        self.error = error
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        if "JSON object" in prompt:
+            with self._lock:
+                self.prompts.append(prompt)
+            raise self.error
+        return super().generate_content(prompt, stream, **kwargs)
+
+
+def extractor(model, **kwargs) -> FeedbackExtractor:
+    return FeedbackExtractor(None, model=model, limiter=RateLimiter(sleep=lambda seconds: None), **kwargs)
+
+
+class CombinedRequestTest(unittest.TestCase):
+
+    def test_combined_path_makes_one_call(self):
+        model = FakeGeminiModel()
+        feedback = extractor(model).analyze(COMMENTS)
+        self.assertEqual(model.calls, 1)
+        self.assertIn("JSON object", model.prompts[0])
+        self.assertTrue(feedback["what_works"].startswith("*   **Clarity**"))
+        self.assertTrue(feedback["needs_improvement"].startswith("*   **Audio**"))
+
+    def test_invalid_json_falls_back_to_two_separate_calls(self):
+        model = InvalidJsonModel()
+        with contextlib.redirect_stdout(io.StringIO()):
+            feedback = extractor(model).analyze(COMMENTS)
+        self.assertEqual(model.calls, 3)
+        self.assertEqual(feedback, {"what_works": "*   **Point 2**: from a separate request.",
+                                    "needs_improvement": "*   **Point 3**: from a separate request."})
+
+    def test_throttling_error_does_not_fall_back(self):
+        model = FailingCombinedModel(ResourceExhausted("429 quota exhausted"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            feedback = extractor(model).analyze(COMMENTS)
+        self.assertIsNone(feedback)
+        # The limiter's retries of the combined request, and nothing else
+        self.assertEqual(model.calls, RateLimiter().max_retries + 1)
+        self.assertTrue(all("JSON object" in prompt for prompt in model.prompts))
+
+    def test_rejected_request_falls_back_to_two_separate_calls(self):
+        model = FailingCombinedModel(InvalidArgument("response_mime_type is not supported"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            feedback = extractor(model).analyze(COMMENTS)
+        self.assertEqual(model.calls, 3)
+        self.assertEqual(feedback["needs_improvement"], "*   **Point 3**: from a separate request.")
+
+    def test_single_request_off_makes_two_calls(self):
+        model = FakeGeminiModel()
+        with contextlib.redirect_stdout(io.StringIO()):
+            extractor(model, single_request=False).analyze(COMMENTS)
+        self.assertEqual(model.calls, 2)
+        self.assertFalse(any("JSON object" in prompt for prompt in model.prompts))
+
+
+class ParseCombinedResponseTest(unittest.TestCase):
+
+    def test_plain_json(self):
+        text = json.dumps({"what_works": "  *   **Clarity**: clear.  ", "needs_improvement": "*   **Audio**: quiet."})
+        self.assertEqual(FeedbackExtractor.parse_combined_response(text),
+                         {"what_works": "*   **Clarity**: clear.", "needs_improvement": "*   **Audio**: quiet."})
+
+    def test_code_fence_is_stripped(self):
+        text = '```json\n{"what_works": "a", "needs_improvement": "b"}\n```'
+        self.assertEqual(FeedbackExtractor.parse_combined_response(text), {"what_works": "a", "needs_improvement": "b"})
+
+    def test_list_values_become_bullets(self):
+        text = json.dumps({"what_works": ["**Clarity**: clear.", "* **Pacing**: good."], "needs_improvement": "x"})
+        self.assertEqual(FeedbackExtractor.parse_combined_response(text)["what_works"],
+                         "*   **Clarity**: clear.\n* **Pacing**: good.")
+
+    def test_malformed_replies_raise_value_error(self):
+        for text in ("not json at all", "[1, 2]", '{"what_works": "a"}', '{"what_works": "a", "needs_improvement": " "}',
+                     '{"what_works": 3, "needs_improvement": "b"}'):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                FeedbackExtractor.parse_combined_response(text)
+
+
+class ParsePartialResponseTest(unittest.TestCase):
+
+    def test_first_field_cut_short(self):
+        self.assertEqual(FeedbackExtractor.parse_partial_response('{"what_works": "*   **Clar'),
+                         {"what_works": "*   **Clar", "needs_improvement": ""})
+
+    def test_complete_first_field_and_partial_second(self):
+        text = '{"what_works": "a\\nb", "needs_improvement": "*   **Au'
+        self.assertEqual(FeedbackExtractor.parse_partial_response(text),
+                         {"what_works": "a\nb", "needs_improvement": "*   **Au"})
+
+    def test_escape_cut_short_is_dropped(self):
+        self.assertEqual(FeedbackExtractor.parse_partial_response('{"what_works": "caf\\u00')["what_works"], "caf")
+        self.assertEqual(FeedbackExtractor.parse_partial_response('{"what_works": "say \\"hi\\"')["what_works"],
+                         'say "hi"')
+
+    def test_nothing_yet(self):
+        self.assertEqual(FeedbackExtractor.parse_partial_response(""), {"what_works": "", "needs_improvement": ""})
+
+
+if __name__ == "__main__":
+    unittest.main()
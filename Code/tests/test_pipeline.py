@@ -0,0 +1,39 @@
+"""
+Stage ordering of the analysis pipeline against the local fakes.
+Run from the Code directory: python -m unittest discover tests
+"""
+import unittest
+from benchmarks.fakes import FakeGeminiModel, FakeTranscriptApi, FakeYouTube
+from pipeline import analyze_video
+from rate_limiter import RateLimiter
+from youtubeAPICon import YouTubeAPICon
+
+VIDEO_URL = "https://www.youtube.com/watch?v=abcdefghijk"
+
+
+def run(youtube: FakeYouTube, model: FakeGeminiModel, **options):
+    api = YouTubeAPICon(None, limiter=RateLimiter(), youtube=youtube, transcript_api=FakeTranscriptApi(1))
+    return analyze_video(VIDEO_URL, None, None, api=api, model=model, limiter=RateLimiter(), **options)
+
+
+class CommentGateTest(unittest.TestCase):
+
+    def test_too_few_comments_are_rejected_from_metadata(self):
+        youtube = FakeYouTube(50)
+        model = FakeGeminiModel()
+        with self.assertRaisesRegex(ValueError, "minimum of 100 comments"):
+            run(youtube, model)
+        self.assertEqual(model.calls, 0)
+        self.assertNotIn("commentThreads.list", youtube.calls)
+
+    def test_summary_overlaps_comment_paging(self):
+        finished = []
+        results = run(FakeYouTube(600, page_latency=0.05), FakeGeminiModel(latency=0.05),
+                      on_update=lambda stage, value: finished.append(stage))
+        self.assertIsNotNone(results["summary"])
+        # Six comment pages take 0.3 s, the summary request 0.05 s once the transcript is in
+        self.assertLess(finished.index("summary"), finished.index("comments"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Token buckets, backoff and retry classification of RateLimiter, with a fake clock and fake endpoints.
+Run from the Code directory: python -m unittest discover tests
+"""
+import time
+import unittest
+from email.utils import formatdate
+import httplib2
+from googleapiclient.errors import HttpError
+from rate_limiter import QuotaExceededError, RateLimiter, is_retryable, retry_after_seconds
+
+
+class FakeClock:
+    """Monotonic clock that only moves when sleep() is called, recording every sleep"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeEndpoint:
+    """Raises the given errors in turn, then returns "ok"; counts every call"""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def http_error(status: int, content: bytes = b"", **headers: str) -> HttpError:
+    return HttpError(httplib2.Response({"status": str(status), **headers}), content)
+
+
+def limiter(clock: FakeClock, **kwargs) -> RateLimiter:
+    return RateLimiter(clock=clock, sleep=clock.sleep, rng=lambda: 0.5, **kwargs)
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def test_waits_for_tokens_to_refill(self):
+        clock = FakeClock()
+        rate_limiter = limiter(clock).configure("gemini", 2, 1)  # 2 requests per second
+        for _ in range(3):
+            rate_limiter.acquire("gemini")
+        self.assertEqual(clock.sleeps, [0.5])
+
+    def test_unconfigured_service_is_unlimited(self):
+        clock = FakeClock()
+        rate_limiter = limiter(clock)
+        for _ in range(1000):
+            rate_limiter.acquire("youtube", cost=100)
+        self.assertEqual(clock.sleeps, [])
+
+    def test_quota_exceeded_when_wait_is_too_long(self):
+        clock = FakeClock()
+        rate_limiter = limiter(clock, max_wait=60).configure("youtube", 100, 86400)
+        rate_limiter.acquire("youtube", cost=100)
+        with self.assertRaises(QuotaExceededError):
+            rate_limiter.acquire("youtube")
+        with self.assertRaises(QuotaExceededError):
+            rate_limiter.acquire("youtube", cost=101)  # more than the bucket ever holds
+        self.assertEqual(clock.sleeps, [])
+
+    def test_quota_exceeded_is_not_retried(self):
+        clock = FakeClock()
+        rate_limiter = limiter(clock, max_wait=60).configure("youtube", 1, 86400)
+        endpoint = FakeEndpoint()
+        rate_limiter.call("youtube", endpoint)
+        with self.assertRaises(QuotaExceededError):
+            rate_limiter.call("youtube", endpoint)
+        self.assertEqual(endpoint.calls, 1)
+
+
+class RetryTest(unittest.TestCase):
+
+    def test_exponential_backoff_with_pinned_jitter(self):
+        clock = FakeClock()
+        rate_limiter = limiter(clock, base_delay=1.0, max_delay=6.0)
+        endpoint = FakeEndpoint(*[TimeoutError()] * 4)
+        self.assertEqual(rate_limiter.call("gemini", endpoint), "ok")
+        # rng() * min(max_delay, base_delay * 2 ** attempt), with rng pinned to 0.5
+        self.assertEqual(clock.sleeps, [0.5, 1.0, 2.0, 3.0])
+        self.assertEqual(rate_limiter.retries, {"gemini": 4})
+
+    def test_retry_after_seconds(self):
+        clock = FakeClock()
+        endpoint = FakeEndpoint(http_error(429, **{"retry-after": "7"}))
+        self.assertEqual(limiter(clock).call("youtube", endpoint), "ok")
+        self.assertEqual(clock.sleeps, [7.0])
+
+    def test_retry_after_http_date(self):
+        error = http_error(503, **{"retry-after": formatdate(time.time() + 30, usegmt=True)})
+        self.assertAlmostEqual(retry_after_seconds(error), 30, delta=2)
+        self.assertEqual(retry_after_seconds(http_error(503, **{"retry-after": "not a date"})), None)
+        self.assertEqual(retry_after_seconds(http_error(503)), None)
+
+    def test_retry_after_is_capped_by_max_wait(self):
+        clock = FakeClock()
+        endpoint = FakeEndpoint(http_error(429, **{"retry-after": "3600"}))
+        limiter(clock, max_wait=120).call("youtube", endpoint)
+        self.assertEqual(clock.sleeps, [120])
+
+    def test_403_rate_limit_is_retried_but_quota_exceeded_is_not(self):
+        rate_limited = http_error(403, b'{"error": {"errors": [{"reason": "rateLimitExceeded"}]}}')
+        quota_exceeded = http_error(403, b'{"error": {"errors": [{"reason": "quotaExceeded"}]}}')
+        self.assertTrue(is_retryable(rate_limited))
+        self.assertFalse(is_retryable(quota_exceeded))
+
+        clock = FakeClock()
+        endpoint = FakeEndpoint(rate_limited)
+        self.assertEqual(limiter(clock).call("youtube", endpoint), "ok")
+        self.assertEqual(endpoint.calls, 2)
+
+        endpoint = FakeEndpoint(quota_exceeded)
+        with self.assertRaises(HttpError):
+            limiter(clock).call("youtube", endpoint)
+        self.assertEqual(endpoint.calls, 1)
+
+    def test_gives_up_after_max_retries(self):
+        clock = FakeClock()
+        rate_limiter = limiter(clock, max_retries=3)
+        endpoint = FakeEndpoint(*[http_error(500)] * 10)
+        with self.assertRaises(HttpError):
+            rate_limiter.call("youtube", endpoint)
+        self.assertEqual(endpoint.calls, 4)
+        self.assertEqual(len(clock.sleeps), 3)
+        self.assertEqual(rate_limiter.retries, {"youtube": 3})
+
+    def test_client_errors_are_not_retried(self):
+        clock = FakeClock()
+        endpoint = FakeEndpoint(http_error(404))
+        with self.assertRaises(HttpError):
+            limiter(clock).call("youtube", endpoint)
+        self.assertEqual(endpoint.calls, 1)
+        self.assertEqual(clock.sleeps, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Transcript splitting and map-reduce summarization, with a local stub model in place of Gemini.
+Run from the Code directory: python -m unittest discover tests
+"""
+import threading
+import time
+import unittest
+from benchmarks.fakes import FakeGeminiModel, FakeResponse
+from rate_limiter import RateLimiter
+from summarizer import Summarizer
+
+
+def sentences(count: int, words: int = 8) -> str:
+    return ' '.join(f"Sentence {i} has " + ' '.join(["word"] * (words - 3)) + "." for i in range(count))
+
+
+class ConcurrencyTrackingModel(FakeGeminiModel):
+    """Counts calls like FakeGeminiModel and records the most calls that were ever in flight at once"""
+
+    def __init__(self, latency: float = 0.0, reply: str = "Partial summary."):
+        super().__init__(latency)
+        self.reply = reply
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._flight_lock = threading.Lock()
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        with self._flight_lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            with self._lock:
+                self.prompts.append(prompt)
+            if self.latency:
+                time.sleep(self.latency)
+            return FakeResponse(self.reply)
+        finally:
+            with self._flight_lock:
+                self.in_flight -= 1
+
+
+def summarizer(model, chunk_chars: int, max_concurrency: int = Summarizer.MAX_CONCURRENCY) -> Summarizer:
+    return Summarizer(None, model=model, chunk_chars=chunk_chars, max_concurrency=max_concurrency,
+                      limiter=RateLimiter())
+
+
+def is_map_prompt(prompt: str) -> bool:
+    return prompt.startswith(Summarizer.CHUNK_PROMPT.split("{index}")[0])
+
+
+def is_combine_prompt(prompt: str) -> bool:
+    return prompt.startswith(Summarizer.COMBINE_PROMPT.split("{index}")[0])
+
+
+def is_reduce_prompt(prompt: str) -> bool:
+    return prompt.startswith(Summarizer.REDUCE_PROMPT.split("{summaries}")[0])
+
+
+class SplitTranscriptTest(unittest.TestCase):
+
+    def test_splits_on_sentence_boundaries(self):
+        transcript = sentences(40)
+        chunks = Summarizer.split_transcript(transcript, 200)
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk), 200)
+            self.assertTrue(chunk.startswith("Sentence") and chunk.endswith("."))
+        self.assertEqual(' '.join(chunks), transcript)
+
+    def test_falls_back_to_word_boundaries(self):
+        # Auto-generated captions: no punctuation at all
+        transcript = ' '.join(f"word{i}" for i in range(500))
+        chunks = Summarizer.split_transcript(transcript, 120)
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk), 120)
+        self.assertEqual(' '.join(chunks).split(), transcript.split())
+
+    def test_short_transcript_is_one_chunk(self):
+        self.assertEqual(Summarizer.split_transcript("  One sentence. Two sentences!  ", 200),
+                         ["One sentence. Two sentences!"])
+
+
+class MapReduceTest(unittest.TestCase):
+
+    def test_short_transcript_makes_one_call(self):
+        model = FakeGeminiModel()
+        summary = summarizer(model, chunk_chars=10000).analyze(sentences(20))
+        self.assertEqual(model.calls, 1)
+        self.assertTrue(summary.startswith("Synthetic response"))
+
+    def test_long_transcript_makes_one_map_call_per_chunk_and_one_reduce(self):
+        model = ConcurrencyTrackingModel()  # short replies, so the partial summaries fit one reduce prompt
+        transcript = sentences(60)
+        chunk_count = len(Summarizer.split_transcript(transcript, 300))
+        summary = summarizer(model, chunk_chars=300).analyze(transcript)
+        self.assertIsNotNone(summary)
+        self.assertEqual(model.calls, chunk_count + 1)
+        self.assertEqual(sum(map(is_map_prompt, model.prompts)), chunk_count)
+        self.assertTrue(is_reduce_prompt(model.prompts[-1]))
+        self.assertTrue(any(f"part {chunk_count} of {chunk_count}" in prompt for prompt in model.prompts))
+
+    def test_map_calls_respect_max_concurrency(self):
+        model = ConcurrencyTrackingModel(latency=0.05)
+        summarizer(model, chunk_chars=200, max_concurrency=3).analyze(sentences(60))
+        self.assertGreater(model.calls, 6)
+        self.assertEqual(model.max_in_flight, 3)
+
+    def test_long_partial_summaries_are_combined_in_groups(self):
+        # Each partial summary is about 100 characters, so the joined partials exceed chunk_chars
+        reply = ' '.join(["Partial summary sentence."] * 4)
+        model = ConcurrencyTrackingModel(reply=reply)
+        transcript = sentences(60)
+        chunk_count = len(Summarizer.split_transcript(transcript, 250))
+        summary = summarizer(model, chunk_chars=250).analyze(transcript)
+        self.assertEqual(summary, reply)
+        # Transcript chunks go through CHUNK_PROMPT, partial summaries only through COMBINE_PROMPT
+        map_prompts = [prompt for prompt in model.prompts if is_map_prompt(prompt)]
+        combine_prompts = [prompt for prompt in model.prompts if is_combine_prompt(prompt)]
+        self.assertEqual(len(map_prompts), chunk_count)
+        self.assertFalse(any("Partial summary" in prompt for prompt in map_prompts))
+        self.assertGreater(len(combine_prompts), 0)
+        for prompt in combine_prompts:
+            self.assertEqual(prompt.count(reply), 2)  # two 100-character summaries fit a 250-character group
+            self.assertNotIn("transcript part", prompt.lower())
+        self.assertEqual(model.calls, chunk_count + len(combine_prompts) + 1)
+        self.assertTrue(is_reduce_prompt(model.prompts[-1]))
+
+    def test_group_summaries(self):
+        self.assertEqual(Summarizer.group_summaries(["a" * 40, "b" * 40, "c" * 40, "d" * 200, "e"], 100),
+                         [["a" * 40, "b" * 40], ["c" * 40], ["d" * 200], ["e"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Context-aware filler removal in transcript cleaning.
+Run from the Code directory: python -m unittest discover tests
+"""
+import unittest
+from data_preprocessor import DataPreprocessor, TranscriptCleaner
+
+
+class FillerWordTest(unittest.TestCase):
+
+    def assertCleaned(self, cases):
+        for raw, expected in cases:
+            with self.subTest(raw=raw):
+                self.assertEqual(DataPreprocessor.remove_filler_words(raw), expected)
+                self.assertEqual(DataPreprocessor.clean_transcript(raw), expected)
+
+    def test_words_with_meaning_are_kept(self):
+        self.assertCleaned([
+            ("Turn right, then go straight.", "turn right, then go straight."),
+            ("I think so, but not sure.", "i think so, but not sure."),
+            ("Do what you like, and enjoy it.", "do what you like, and enjoy it."),
+            ("I like it so much.", "i like it so much."),
+            ("Is it actually true?", "is it actually true?"),
+        ])
+
+    def test_fillers_set_off_by_commas_are_dropped_with_both_commas(self):
+        self.assertCleaned([
+            ("It was, basically, done.", "it was done."),
+            ("It was, like, huge.", "it was huge."),
+            ("It is, you know, hard.", "it is hard."),
+        ])
+
+    def test_fillers_at_sentence_start_are_dropped(self):
+        self.assertCleaned([
+            ("So, today we look at graphs.", "today we look at graphs."),
+            ("Basically it works.", "it works."),
+            ("Done. So, next one.", "done. next one."),
+            ("Done. Basically it works.", "done. it works."),
+            ("That is hard. Um, I mean, yes.", "that is hard. yes."),
+        ])
+
+    def test_tag_questions_are_dropped(self):
+        self.assertCleaned([("That works, right?", "that works?"), ("It is easy, you know.", "it is easy.")])
+
+    def test_sentence_start_carries_across_blocks(self):
+        cleaner = TranscriptCleaner(block_chars=10)
+        self.assertEqual(cleaner.clean(["It ends here.", "So, a new one.", "I think", "so, but no."]),
+                         "it ends here. a new one. i think so, but no.")
+
+    def test_timestamps_and_disfluencies(self):
+        self.assertEqual(DataPreprocessor.clean_transcript("[0:01] Um, hello [0:02] uhh there"), "hello there")
+
+
+if __name__ == "__main__":
+    unittest.main()
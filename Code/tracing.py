@@ -0,0 +1,105 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+logger = logging.getLogger("analysis.trace")
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Tracer:
+    """
+    Collects spans (timed sections of work) and counters for the analysis pipeline.
+    Finished spans are logged as one JSON object per line on the "analysis.trace" logger,
+    counters can be dumped in Prometheus text format, and listeners receive every span
+    start/end event as it happens (the GUI uses this for live progress).
+    """
+
+    def __init__(self):
+        self.counters: Dict[MetricKey, float] = {}
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def _emit(self, event: Dict[str, Any]):
+        with self._lock:
+            listeners = list(self.listeners)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"[ERROR] Trace listener failed: {e}")
+
+    def incr(self, name: str, value: float = 1, **labels: Any):
+        key = (name, tuple(sorted((label, str(v)) for label, v in labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block of work. Extra attributes can be added to the yielded dict while it runs."""
+        event = {"span": name, **attrs}
+        self._emit({**event, "event": "start", "ts": time.time()})
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield event
+        except BaseException as e:
+            status = "error"
+            event["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            event.update(event="end", status=status, seconds=round(duration, 6), ts=time.time())
+            self.incr("span_seconds_sum", duration, span=name)
+            self.incr("span_seconds_count", 1, span=name)
+            if status == "error":
+                self.incr("span_errors_total", 1, span=name)
+            logger.info(json.dumps(event, default=str))
+            self._emit(event)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Current counters as a list of {"name", "labels", "value"} dicts"""
+        with self._lock:
+            items = list(self.counters.items())
+        return [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in items]
+
+    def prometheus_text(self, prefix: str = "yt_analysis_") -> str:
+        lines = []
+        for metric in sorted(self.snapshot(), key=lambda m: (m["name"], sorted(m["labels"].items()))):
+            labels = ",".join(f'{k}="{v}"' for k, v in sorted(metric["labels"].items()))
+            labels = f"{{{labels}}}" if labels else ""
+            lines.append(f"{prefix}{metric['name']}{labels} {metric['value']:g}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+
+
+def enable_json_log(path: str, level: int = logging.INFO):
+    """Write finished spans to `path` as JSON lines"""
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return handler
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer shared by every pipeline component"""
+    return _tracer
@@ -1,34 +1,44 @@
 import tkinter as tk
 from tkinter import messagebox
-from data_retrieval import DataRetrieval
-from summarizer import Summarizer
-from sentiment_analyzer import SentimentAnalyzer
-from feedback_extractor import FeedbackExtractor
-from PIL import Image, ImageTk
+from tracing import get_tracer
+import os
+import queue
 import threading
 import re
-import os
-from datetime import datetime
-
 
-def save_feedback_as_txt(what_works, needs_improvement, output_dir="reports"):
-    os.makedirs(output_dir, exist_ok=True)
-    filename = f"feedback_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-    filepath = os.path.join(output_dir, filename)
-
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write("YouTube Feedback Report\n")
-        f.write("=======================\n\n")
-        f.write("What’s Working:\n")
-        f.write(what_works.strip() + "\n\n")
-        f.write("Needs Improvement:\n")
-        f.write(needs_improvement.strip() + "\n")
-
-    print(f"Text report saved at: {filepath}")
+# The API SDKs (googleapiclient, google.generativeai, youtube_transcript_api, vaderSentiment) and PIL are
+# imported lazily, so the window appears before they load; see YouTubeApp.preload and load_photo.
+IMAGE_CACHE_DIR = os.path.join("cache", "images")
+
+
+def load_photo(path, size, cache_dir=None):
+    """
+    Load an image resized to `size` as a Tk PhotoImage. The resized copy is kept on disk (PPM, or PNG if
+    the image has transparency) and later launches read it straight into Tk, skipping PIL and the decode
+    and resize of the original.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    base = os.path.join(cache_dir or IMAGE_CACHE_DIR, f"{stem}_{size[0]}x{size[1]}")
+    source_mtime = os.path.getmtime(path)
+    for cached in (base + ".ppm", base + ".png"):
+        if os.path.exists(cached) and os.path.getmtime(cached) >= source_mtime:
+            return tk.PhotoImage(file=cached)
+
+    from PIL import Image
+    image = Image.open(path).resize(size)
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    if image.mode in ("RGBA", "LA", "P"):
+        cached, image_format = base + ".png", "PNG"
+    else:
+        cached, image_format = base + ".ppm", "PPM"
+        image = image.convert("RGB")
+    image.save(cached + ".tmp", image_format)
+    os.replace(cached + ".tmp", cached)
+    return tk.PhotoImage(file=cached)
 
 
 class YouTubeApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, preload=True, adaptive=False):
         super().__init__()
         self.title("YouTube Video Analysis")
         self.geometry("960x700")
@@ -50,6 +60,24 @@ class YouTubeApp(tk.Tk):
         self.video_summary = ""
         self.sentiment_data = {}
         self.feedback_data = {}
+        self.stage_timings = {}
+        self.run_id = None
+        self.service_options = {"workers": 1, "sampling": {} if adaptive else None}
+        # Worker threads never touch widgets; they queue updates that poll_updates applies on the Tk main loop
+        self.updates = queue.Queue()
+        self.showing_partial_results = False
+        self.after(50, self.poll_updates)
+        if preload:
+            # Give the window a moment to paint before the heavy imports compete for the GIL
+            self.after(200, lambda: threading.Thread(target=self.preload, daemon=True).start())
+
+    def preload(self):
+        """Import the API SDKs and build the shared service in the background, so the first analysis starts warm"""
+        try:
+            from analysis_service import get_service
+            get_service(**self.service_options)
+        except Exception as e:
+            print(f"[ERROR] Background preload failed: {e}")
 
     def show_frame(self, page):
         self.frames[page].tkraise()
@@ -62,31 +90,64 @@ class YouTubeApp(tk.Tk):
         )
         self.show_frame(ResultsPage)
 
-    def load_video_data(self, video_url):
-        youtube_api_key = os.getenv("YOUTUBE_API_KEY")
-        gemini_api_key = os.getenv("GEMINI_API_KEY")
-
-        dr = DataRetrieval(youtube_api_key, video_url)
-        dr.validate_url()
-        dr.get_metadata()
-        transcript = dr.get_transcript()
-        comments = dr.get_comments()
-
-        self.video_summary = Summarizer(gemini_api_key).analyze(transcript)
-        self.sentiment_data = SentimentAnalyzer().analyze(comments)
-
-        feedback = FeedbackExtractor(gemini_api_key).analyze(comments)
-        if feedback is None:
-            feedback = {
-                "what_works": "No feedback available.",
-                "needs_improvement": "No improvement suggestions."
-            }
-        self.feedback_data = feedback
-
-        save_feedback_as_txt(
-            self.feedback_data["what_works"],
-            self.feedback_data["needs_improvement"]
-        )
+    def post_update(self, stage, value):
+        """Thread-safe: queue a stage result, streamed text, or "done"/"error" for the main loop"""
+        self.updates.put((stage, value))
+
+    def poll_updates(self):
+        try:
+            while True:
+                stage, value = self.updates.get_nowait()
+                self.apply_update(stage, value)
+        except queue.Empty:
+            pass
+        self.after(50, self.poll_updates)
+
+    def apply_update(self, stage, value):
+        home = self.frames[HomePage]
+        results_page = self.frames[ResultsPage]
+        if stage == "error":
+            home.close_loading_popup()
+            messagebox.showerror("Error", value)
+        elif stage == "done":
+            home.close_loading_popup()
+            self.show_results_page()
+        elif stage in ("summary", "sentiment", "feedback") and value is not None:
+            # Switch to the results as soon as anything can be shown and let the rest stream in
+            if not self.showing_partial_results:
+                self.showing_partial_results = True
+                home.close_loading_popup()
+                results_page.clear_content()
+                self.show_frame(ResultsPage)
+            results_page.show_partial(stage, value)
+
+    def load_video_data(self, video_url, on_update=None):
+        self.showing_partial_results = False
+        # The shared service keeps the API clients and analyzers warm between videos
+        from analysis_service import get_service
+        service = get_service(**self.service_options)
+        results = service.analyze(video_url, on_update=on_update)
+        self.stage_timings = results["timings"]
+        print("Stage timings: " + ", ".join(f"{name}={secs:.2f}s" for name, secs in self.stage_timings.items()))
+        print(f"Cache: {service.cache.stats()}")
+
+        self.video_summary = results["summary"]
+        self.sentiment_data = results["sentiment"]
+        self.feedback_data = results["feedback"]
+        # Saved to the result store; text reports are written from it with the Export button
+        self.run_id = service.record(video_url, results).get("run_id")
+
+    def export_report(self):
+        if not self.run_id:
+            messagebox.showinfo("Export", "Analyze a video first.")
+            return
+        from result_store import get_store
+        try:
+            path = get_store().export(self.run_id)
+        except Exception as e:
+            messagebox.showerror("Export failed", str(e))
+            return
+        messagebox.showinfo("Export", f"Report saved at: {path}")
 
 
 class HomePage(tk.Frame):
@@ -97,8 +158,7 @@ class HomePage(tk.Frame):
         self.grid_columnconfigure(0, weight=1)
 
         try:
-            bg_image = Image.open("assets/background.jpg").resize((960, 700))
-            self.bg_photo = ImageTk.PhotoImage(bg_image)
+            self.bg_photo = load_photo("assets/background.jpg", (960, 700))
             bg_label = tk.Label(self, image=self.bg_photo)
             bg_label.place(relwidth=1, relheight=1)
         except:
@@ -108,8 +168,7 @@ class HomePage(tk.Frame):
         content_frame.place(relx=0.5, rely=0.3, anchor="n")
 
         try:
-            logo_img = Image.open("assets/youtube_logo.png").resize((100, 70))
-            self.logo = ImageTk.PhotoImage(logo_img)
+            self.logo = load_photo("assets/youtube_logo.png", (100, 70))
             tk.Label(content_frame, image=self.logo, bg="#ffffff").pack(pady=(10, 10))
         except:
             tk.Label(content_frame, text="🎬", font=("Helvetica", 36), bg="#ffffff").pack(pady=(10, 10))
@@ -144,13 +203,16 @@ class HomePage(tk.Frame):
 
         self.loading_popup = tk.Toplevel(self)
         self.loading_popup.title("Analyzing")
-        self.loading_popup.geometry("300x100")
+        self.loading_popup.geometry("320x230")
         self.loading_popup.resizable(False, False)
         self.loading_popup.grab_set()
 
         self.status_label = tk.Label(self.loading_popup, text="Initializing...", font=("Arial", 12))
-        self.status_label.pack(expand=True, pady=10)
+        self.status_label.pack(pady=(15, 5))
+        self.stage_label = tk.Label(self.loading_popup, text="", font=("Courier", 10), justify="left")
+        self.stage_label.pack(expand=True, padx=10, anchor="w")
 
+        self.stage_status = {}
         self.dots = 0
         self.animate_loading()
         threading.Thread(target=self.run_analysis, args=(video_url,), daemon=True).start()
@@ -159,19 +221,37 @@ class HomePage(tk.Frame):
         if hasattr(self, 'loading_popup') and self.loading_popup.winfo_exists():
             self.dots = (self.dots + 1) % 4
             self.status_label.config(text=f"Analyzing video{'.' * self.dots}")
+            self.stage_label.config(text="\n".join(
+                f"{stage:<12}{status}" for stage, status in list(self.stage_status.items())
+            ))
             self.after(500, self.animate_loading)
 
+    def on_trace_event(self, event):
+        """Tracer listener, called from worker threads; animate_loading renders the collected state"""
+        if event.get("kind") != "stage":
+            return
+        if event["event"] == "start":
+            self.stage_status[event["span"]] = "running..."
+        elif event["status"] == "ok":
+            self.stage_status[event["span"]] = f"done {event['seconds']:.1f}s"
+        else:
+            self.stage_status[event["span"]] = "failed"
+
+    def close_loading_popup(self):
+        if hasattr(self, 'loading_popup') and self.loading_popup.winfo_exists():
+            self.loading_popup.destroy()
+
     def run_analysis(self, video_url):
+        """Runs on a worker thread; results reach the UI through controller.post_update"""
+        tracer = get_tracer()
+        tracer.add_listener(self.on_trace_event)
         try:
-            self.status_label.config(text="Fetching metadata...")
-            self.controller.load_video_data(video_url)
-            if hasattr(self, 'loading_popup'):
-                self.loading_popup.destroy()
-            self.controller.show_results_page()
+            self.controller.load_video_data(video_url, on_update=self.controller.post_update)
+            self.controller.post_update("done", None)
         except Exception as e:
-            if hasattr(self, 'loading_popup'):
-                self.loading_popup.destroy()
-            messagebox.showerror("Error", str(e))
+            self.controller.post_update("error", str(e))
+        finally:
+            tracer.remove_listener(self.on_trace_event)
 
 
 class ResultsPage(tk.Frame):
@@ -191,8 +271,7 @@ class ResultsPage(tk.Frame):
 
         # === Background Image ===
         try:
-            bg_image = Image.open("assets/background2.jpg").resize((960, 1600))
-            self.bg_photo = ImageTk.PhotoImage(bg_image)
+            self.bg_photo = load_photo("assets/background2.jpg", (960, 1600))
             bg_label = tk.Label(self.scroll_frame, image=self.bg_photo)
             bg_label.place(x=0, y=0, relwidth=1, relheight=1)
         except:
@@ -206,6 +285,9 @@ class ResultsPage(tk.Frame):
                   command=lambda: controller.show_frame(controller.frames.keys().__iter__().__next__()),
                   bg="#343a40", fg="white", padx=10, pady=5, relief="flat").pack(side="left")
 
+        tk.Button(header, text="Export Report", font=("Arial", 11, "bold"), command=controller.export_report,
+                  bg="#343a40", fg="white", padx=10, pady=5, relief="flat").pack(side="right")
+
         tk.Label(self.scroll_frame, text="📊 Video Analysis Results", font=("Helvetica", 18, "bold"),
                  bg="#f8f9fa").pack(pady=(5, 10))
 
@@ -238,16 +320,42 @@ class ResultsPage(tk.Frame):
     def _remove_formatting(self, text):
         return re.sub(r'\*\*(.*?)\*\*', r'\1', text)
 
-    def update_content(self, summary, sentiment, feedback):
-        self.summary_text.config(text=self._remove_formatting(summary.strip()))
-
-        total = sum(len(lst) for lst in sentiment.values()) or 1
-        pos = (len(sentiment["positive"]) / total) * 100
-        neg = (len(sentiment["negative"]) / total) * 100
-        neu = (len(sentiment["neutral"]) / total) * 100
+    def clear_content(self):
+        for label in (self.summary_text, self.sentiment_text, self.works_text, self.needs_text):
+            label.config(text="Generating...")
+
+    def show_partial(self, stage, value):
+        """Render one section while the others are still being produced"""
+        if stage == "summary":
+            self.show_summary(value)
+        elif stage == "sentiment":
+            self.show_sentiment(value)
+        elif stage == "feedback":
+            self.show_feedback(value)
+
+    def show_summary(self, summary):
+        self.summary_text.config(text=self._remove_formatting((summary or "").strip()))
+
+    def show_sentiment(self, sentiment):
+        from sentiment_analyzer import SentimentAnalyzer  # already loaded by the time results arrive
+        counts = SentimentAnalyzer.counts(sentiment)
+        total = sum(counts.values()) or 1
+        pos = (counts["positive"] / total) * 100
+        neg = (counts["negative"] / total) * 100
+        neu = (counts["neutral"] / total) * 100
         sentiment_summary = f"Positive: {pos:.1f}%   Negative: {neg:.1f}%   Neutral: {neu:.1f}%"
+        sample = sentiment.get("sample")
+        if sample:
+            sentiment_summary += (f"\nBased on {sample['sample_size']} comments; each share is accurate to "
+                                  f"±{sample['margin'] * 100:.1f} points ({sample['confidence']:.0%} confidence)")
         self.sentiment_text.config(text=sentiment_summary)
 
+    def show_feedback(self, feedback):
         self.works_text.config(text=self._remove_formatting(feedback.get("what_works", "").strip()))
         self.needs_text.config(text=self._remove_formatting(feedback.get("needs_improvement", "").strip()))
 
+    def update_content(self, summary, sentiment, feedback):
+        self.show_summary(summary)
+        self.show_sentiment(sentiment)
+        self.show_feedback(feedback)
+
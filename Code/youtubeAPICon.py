@@ -1,20 +1,47 @@
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from youtube_transcript_api import YouTubeTranscriptApi
-from typing import Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from cache import ResultCache
+from rate_limiter import RateLimiter, get_rate_limiter
+from tracing import get_tracer
+import queue
+import threading
+
+_END_OF_PAGES = object()
 
 
 class YouTubeAPICon:
-    def __init__(self, api_key: str):
+    # Cache lifetimes in seconds; metadata and comments change, transcripts practically never do
+    METADATA_TTL = 60 * 60
+    COMMENTS_TTL = 6 * 60 * 60
+    TRANSCRIPT_TTL = 7 * 24 * 60 * 60
+
+    def __init__(self, api_key: str, cache: Optional[ResultCache] = None, limiter: Optional[RateLimiter] = None,
+                 youtube: Any = None, transcript_api: Any = None):
         self.api_key = api_key
-        self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+        self.cache = cache
+        self.limiter = limiter or get_rate_limiter()
+        # Clients can be injected, e.g. the local fakes used by the benchmarks
+        self.youtube = youtube if youtube is not None else build('youtube', 'v3', developerKey=self.api_key)
+        self.transcript_api = transcript_api if transcript_api is not None else YouTubeTranscriptApi
 
     def fetch_metadata(self, video_id: str) -> Dict[str, str]:
+        if self.cache is None:
+            return self._fetch_metadata(video_id)
+        return self.cache.get_or_compute(
+            ResultCache.make_key("metadata", video_id),
+            lambda: self._fetch_metadata(video_id),
+            ttl=self.METADATA_TTL
+        )
+
+    def _fetch_metadata(self, video_id: str) -> Dict[str, str]:
         try:
-            response = self.youtube.videos().list(
+            request = self.youtube.videos().list(
                 part="snippet,contentDetails,statistics",
                 id=video_id
-            ).execute()
+            )
+            response = self.limiter.call("youtube", request.execute)
             items = response.get('items', [])
             if not items:
                 raise ValueError("Video not found")
@@ -22,53 +49,260 @@ class YouTubeAPICon:
             metadata = items[0]
             return {
                 "title": metadata['snippet']['title'],
+                "channel_id": metadata['snippet'].get('channelId'),
+                "channel": metadata['snippet'].get('channelTitle'),
                 "duration": metadata['contentDetails']['duration'],
                 "views": metadata['statistics']['viewCount'],
                 "likes": metadata['statistics'].get('likeCount', '0'),
-                "dislikes": metadata['statistics'].get('dislikeCount', '0')
+                "dislikes": metadata['statistics'].get('dislikeCount', '0'),
+                # Top-level comments and replies; absent when the comment count is hidden
+                "comments": metadata['statistics'].get('commentCount')
             }
+
         except HttpError as e:
             raise ConnectionError(f"Metadata API error: {e.resp.status}") from e
 
-    def fetch_comments(self, video_id: str, max_comments: int = 3000) -> List[str]:
-        """Fetch up to max_comments (default 3000) top-level comments from YouTube API"""
+    def fetch_uploads_playlist(self, channel: str) -> str:
+        """ID of a channel's uploads playlist. `channel` is a channel ID (UC...) or a handle (@name)."""
+        if self.cache is None:
+            return self._fetch_uploads_playlist(channel)
+        return self.cache.get_or_compute(
+            ResultCache.make_key("uploads_playlist", channel),
+            lambda: self._fetch_uploads_playlist(channel),
+            ttl=self.TRANSCRIPT_TTL  # a channel's uploads playlist never changes
+        )
+
+    def _fetch_uploads_playlist(self, channel: str) -> str:
+        params = {"forHandle": channel} if channel.startswith("@") else {"id": channel}
+        try:
+            request = self.youtube.channels().list(part="contentDetails", **params)
+            response = self.limiter.call("youtube", request.execute)
+        except HttpError as e:
+            raise ConnectionError(f"Channels API error: {e.resp.status}") from e
+        items = response.get('items', [])
+        if not items:
+            raise ValueError(f"Channel not found: {channel}")
+        return items[0]['contentDetails']['relatedPlaylists']['uploads']
+
+    def fetch_playlist_video_ids(self, playlist_id: str, max_videos: int = 50) -> List[str]:
+        """IDs of up to max_videos videos in a playlist, in playlist order (newest first for uploads)"""
+        if self.cache is None:
+            return self._fetch_playlist_video_ids(playlist_id, max_videos)
+        return self.cache.get_or_compute(
+            ResultCache.make_key("playlist", playlist_id, max_videos),
+            lambda: self._fetch_playlist_video_ids(playlist_id, max_videos),
+            ttl=self.METADATA_TTL
+        )
+
+    def _fetch_playlist_video_ids(self, playlist_id: str, max_videos: int) -> List[str]:
+        video_ids = []
+        try:
+            request = self.youtube.playlistItems().list(
+                part="contentDetails",
+                playlistId=playlist_id,
+                maxResults=min(50, max_videos)  # 50 is the API maximum per page
+            )
+            while request is not None and len(video_ids) < max_videos:
+                response = self.limiter.call("youtube", request.execute)
+                video_ids.extend(item['contentDetails']['videoId'] for item in response['items'])
+                request = self.youtube.playlistItems().list_next(request, response)
+        except HttpError as e:
+            raise ConnectionError(f"Playlist API error: {e.resp.status}") from e
+        return video_ids[:max_videos]
+
+    def fetch_comments(self, video_id: str, max_comments: int = 3000, prefetch: int = 2) -> List[str]:
+        """
+        Texts of up to max_comments (default 3000) top-level comments as a plain list. Not cached; the analysis
+        path uses iter_comment_threads and caches a CommentStore instead.
+        """
+        if prefetch < 0:
+            raise ValueError("prefetch must not be negative")
         comments = []
+        for page in self._prefetch_pages(video_id, max_comments, prefetch, YouTubeAPICon._comment_text):
+            comments.extend(page)
+        return comments
+
+    def iter_comment_records(self, video_id: str, max_comments: int = 3000, order: str = "time",
+                             prefetch: int = 0, page_token: Optional[str] = None
+                             ) -> Iterator[Tuple[Optional[str], List[Dict[str, Any]]]]:
+        """
+        Yield (cursor, page) pairs, each page holding top-level comments as dicts with id, text, likes and
+        published_at. The cursor is the page token to pass back as page_token to continue right after that page
+        (None at the end of the comments), so callers can stop at max_comments and resume in a later run.
+        With order="time" (newest first) callers can stop paging once they reach comments they have already seen.
+        Not cached, since the point is to see new comments. Pages are fetched on a background thread, up to
+        `prefetch` ahead of the consumer (see _prefetch); the default prefetch=0 fetches each page only when
+        the consumer asks for it, so stopping early never spends quota on pages that are thrown away.
+        """
+        if prefetch < 0:
+            raise ValueError("prefetch must not be negative")
+        yield from self._prefetch_pages(video_id, max_comments, prefetch, YouTubeAPICon._comment_record, order=order,
+                                        page_token=page_token, with_cursor=True)
+
+    def iter_comment_threads(self, video_id: str, max_comments: int = 3000, include_replies: bool = False,
+                             prefetch: int = 2) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield pages of comment records (id, text, likes, published_at, parent_id), one page per comment thread
+        page. With include_replies each top-level comment is followed by its replies: the up to five replies
+        embedded in the thread, or, for longer threads, all of them paged through comments.list.
+        Replies count towards max_comments. Not cached; callers cache their compact form instead.
+        """
+        if prefetch < 0:
+            raise ValueError("prefetch must not be negative")
+        yield from self._prefetch_pages(video_id, max_comments, prefetch, YouTubeAPICon._comment_record,
+                                        include_replies=include_replies)
+
+    @staticmethod
+    def _comment_text(item: Dict[str, Any]) -> str:
+        return item['snippet']['topLevelComment']['snippet']['textDisplay']
+
+    @staticmethod
+    def _comment_record(item: Dict[str, Any]) -> Dict[str, Any]:
+        top = item['snippet']['topLevelComment']
+        return {
+            "id": top['id'],
+            "text": top['snippet']['textDisplay'],
+            "likes": top['snippet'].get('likeCount', 0),
+            "published_at": top['snippet'].get('publishedAt', ''),
+        }
+
+    @staticmethod
+    def _reply_record(reply: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": reply['id'],
+            "text": reply['snippet']['textDisplay'],
+            "likes": reply['snippet'].get('likeCount', 0),
+            "published_at": reply['snippet'].get('publishedAt', ''),
+            "parent_id": reply['snippet'].get('parentId'),
+        }
+
+    def _prefetch_pages(self, video_id: str, max_comments: int, prefetch: int, parse: Callable[[Dict[str, Any]], Any],
+                        **options: Any) -> Iterator[Any]:
+        return self._prefetch(lambda: self._fetch_pages(video_id, max_comments, parse, **options), prefetch)
+
+    @staticmethod
+    def _prefetch(fetch: Callable[[], Iterator[List[Any]]], prefetch: int) -> Iterator[List[Any]]:
+        """
+        Run the page generator made by fetch on a worker thread, buffering up to `prefetch` pages ahead of the
+        consumer. Page tokens chain, so the requests themselves are still issued one after another. Errors are
+        re-raised in the consumer, and closing the returned generator stops the worker.
+        """
+        if prefetch == 0:
+            yield from fetch()
+            return
+        pages = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for page in fetch():
+                    if not put(page):
+                        return
+                put(_END_OF_PAGES)
+            except Exception as e:
+                put(e)
+
+        worker = threading.Thread(target=produce, daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = pages.get()
+                if item is _END_OF_PAGES:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+    def _fetch_pages(self, video_id: str, max_comments: int, parse: Callable[[Dict[str, Any]], Any],
+                     order: Optional[str] = None, include_replies: bool = False, page_token: Optional[str] = None,
+                     with_cursor: bool = False) -> Iterator[Any]:
+        """
+        Fetch comment thread pages one by one in the calling thread, parsing each thread with `parse`.
+        With include_replies (record parsers only) each thread is followed by its reply records.
+        Paging starts at page_token if given. with_cursor yields (cursor, page) pairs, where the cursor is the
+        token to resume from after the page: the next page's, or this page's own if max_comments cut it short
+        ("" for the first page). It is None after the last page.
+        """
+        fetched = 0
+        params = {"order": order} if order else {}
+        if page_token:
+            params["pageToken"] = page_token
+        page_token = page_token or ""
         try:
             request = self.youtube.commentThreads().list(
-                part="snippet",
+                part="snippet,replies" if include_replies else "snippet",
                 videoId=video_id,
                 textFormat="plainText",
-                maxResults=100  # Fetch 100 comments per page (max allowed by YouTube API)
+                maxResults=100,  # Fetch 100 comments per page (max allowed by YouTube API)
+                **params
             )
-            while request and len(comments) < max_comments:
-                response = request.execute()
+            while request is not None and fetched < max_comments:
+                response = self.limiter.call("youtube", request.execute)
+                page = []
                 for item in response['items']:
-                    comments.append(
-                        item['snippet']['topLevelComment']['snippet']['textDisplay']
-                    )
-                    if len(comments) >= max_comments:
-                        break  # Stop fetching more comments once limit is reached
-
-                # Check if there are more pages of comments
-                if 'nextPageToken' in response and len(comments) < max_comments:
-                    request = self.youtube.commentThreads().list(
-                        part="snippet",
-                        videoId=video_id,
-                        textFormat="plainText",
-                        maxResults=100,
-                        pageToken=response['nextPageToken']
-                    )
-                else:
-                    break  # No more pages, exit loop
-
-            return comments
+                    page.append(parse(item))
+                    if include_replies:
+                        page.extend(self._thread_replies(item, max_comments - fetched - len(page)))
+                cursor = response.get('nextPageToken') if len(page) <= max_comments - fetched else page_token
+                page = page[:max_comments - fetched]
+                fetched += len(page)
+                get_tracer().incr("comment_pages_total")
+                yield (cursor, page) if with_cursor else page
+                page_token = response.get('nextPageToken')
+                # Reuse the previous request instead of rebuilding it for the next page
+                request = self.youtube.commentThreads().list_next(request, response)
         except HttpError as e:
             raise ConnectionError(f"Comments API error: {e.resp.status}") from e
 
-    def fetch_transcript(self, video_id: str) -> str:
+    def _thread_replies(self, item: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        """Up to `limit` replies of one thread, fetching the ones that are not embedded in the thread resource"""
+        if limit <= 0:
+            return []
+        embedded = item.get('replies', {}).get('comments', [])
+        if item['snippet'].get('totalReplyCount', 0) <= len(embedded) or len(embedded) >= limit:
+            return [YouTubeAPICon._reply_record(reply) for reply in embedded[:limit]]
+        replies = []
+        request = self.youtube.comments().list(
+            part="snippet", parentId=item['id'], textFormat="plainText", maxResults=100
+        )
+        while request is not None and len(replies) < limit:
+            response = self.limiter.call("youtube", request.execute)
+            replies.extend(YouTubeAPICon._reply_record(reply) for reply in response['items'])
+            get_tracer().incr("comment_pages_total", kind="replies")
+            request = self.youtube.comments().list_next(request, response)
+        return replies[:limit]
+
+    def fetch_transcript_segments(self, video_id: str) -> List[str]:
+        """Text of each transcript entry, in order. Not cached; raises if the transcript is unavailable."""
+        transcript_list = self.limiter.call("transcript", self.transcript_api.get_transcript, video_id)
+        return [entry['text'] for entry in transcript_list]
+
+    def fetch_transcript(self, video_id: str, cleaner: Optional[Callable[[List[str]], str]] = None) -> str:
+        """
+        Whole transcript as one string. With a cleaner, the segments are cleaned before they are joined,
+        so no raw copy of the full transcript is ever built, and the cleaned text is what gets cached.
+        """
+        cache_key = ResultCache.make_key("transcript", video_id, "clean" if cleaner else "raw")
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
         try:
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-            transcript = ' '.join([entry['text'] for entry in transcript_list])
-            return transcript
+            segments = self.fetch_transcript_segments(video_id)
         except Exception as e:
-            return f"Transcript unavailable: {str(e)}"
\ No newline at end of file
+            return f"Transcript unavailable: {str(e)}"
+        transcript = cleaner(segments) if cleaner else ' '.join(segments)
+        if self.cache is not None:
+            self.cache.set(cache_key, transcript, ttl=self.TRANSCRIPT_TTL)
+        return transcript
\ No newline at end of file